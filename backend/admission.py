@@ -0,0 +1,135 @@
+# backend/admission.py
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from backend.server_timing import record_timing
+
+logger = logging.getLogger(__name__)
+
+
+class ServerBusy(Exception):
+    """The admission queue is full, the client should retry later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Global cap on in-flight game requests with a bounded FIFO wait queue
+
+    Every /api/start and /api/play runs several LLM calls. At most
+    `max_in_flight` of them run at once; the next `max_queue` wait their
+    turn (their position can be polled by ticket) and anything beyond that
+    is turned away with a Retry-After estimated from recent request times.
+    A spike then means waiting in line instead of every game slowing down.
+    A request still in line after `max_wait` seconds is turned away too.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_queue: int = 32,
+        max_wait: Optional[float] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.in_flight = 0
+        self._queue: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self._service_time: Optional[float] = None  # EWMA seconds per request
+
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    @asynccontextmanager
+    async def admit(self, ticket: str):
+        """Hold an in-flight slot, waiting in line for it if needed"""
+        queued_at = time.monotonic()
+        await self._acquire(ticket)
+        start = time.monotonic()
+        record_timing("admission", start - queued_at)
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._service_time = (
+                elapsed
+                if self._service_time is None
+                else 0.8 * self._service_time + 0.2 * elapsed
+            )
+            self._release()
+
+    def position(self, ticket: str) -> Optional[int]:
+        """1-based place in line, None once admitted (or unknown)"""
+        for position, queued in enumerate(self._queue, start=1):
+            if queued == ticket:
+                return position
+        return None
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get in"""
+        service_time = self._service_time or 10.0
+        waves = (len(self._queue) + 1) / self.max_in_flight
+        return max(1, math.ceil(service_time * waves))
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": len(self._queue),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "avg_request_seconds": round(self._service_time or 0.0, 2),
+        }
+
+    async def _acquire(self, ticket: str):
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return
+
+        if len(self._queue) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise ServerBusy(self.retry_after())
+
+        if ticket in self._queue:
+            ticket = f"{ticket}-{uuid.uuid4().hex[:8]}"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue[ticket] = waiter
+        self.stats["queued"] += 1
+        logger.info(f"Request queued at position {len(self._queue)}")
+
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            # waited long enough; a retry later beats the client timing out
+            self._queue.pop(ticket, None)
+            self.stats["rejected"] += 1
+            raise ServerBusy(self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # admitted just as we were cancelled, give the slot back
+                self._release()
+            else:
+                self._queue.pop(ticket, None)
+            raise
+
+        self.stats["admitted"] += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        while self._queue and self.in_flight < self.max_in_flight:
+            _, waiter = self._queue.popitem(last=False)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
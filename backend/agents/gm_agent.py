@@ -1,10 +1,11 @@
-from anthropic import Anthropic
 import json
-import os
 import logging
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from backend.models.game_state import GameState
+from backend.models.session_profile import SessionProfile
+from backend.llm.client import LLMClient, get_default_client
+from backend.metrics import counts_fallback
 
 # Logging of prompts, player actions, and state
 logger = logging.getLogger(__name__)
@@ -28,17 +29,18 @@ class GMAgent:
     The GM is neutral and does not favour player or NPCs.
     """
 
-    def __init__(self):
+    def __init__(
+        self, profile: Optional[SessionProfile] = None, llm: Optional[LLMClient] = None
+    ):
         """
         Initialize GM Agent
-        """
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-
-        if not api_key:
-            raise RuntimeError("ANTHROPIC_API_KEY is not set in the environment")
 
-        self.client = Anthropic(api_key=api_key)
-        self.model = "claude-sonnet-4-5-20250929"
+        Args:
+            profile: Session profile (models, token caps, timeouts per call)
+            llm: Shared call layer (model routing, stats)
+        """
+        self.llm = llm or get_default_client()
+        self.profile = profile or SessionProfile()
 
         logger.info("GM Agent initialized")
 
@@ -141,6 +143,7 @@ class GMAgent:
 
         response = await self._call_claude(
             prompt=prompt,
+            call_type="generate_opening_scene",
             game_state=game_state,
             response_schema={
                 "type": "object",
@@ -270,6 +273,7 @@ Respond ONLY with valid JSON without any markdown or formatting:
             logger.info("GM interpreting moment.")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="interpret_moment",
                 game_state=game_state,
                 response_schema={
                     "type": "object",
@@ -321,6 +325,7 @@ Respond ONLY with valid JSON without any markdown or formatting:
             # fallback to basic interpretation
             return self._fallback_interpretation(player_input, initiator, game_state)
 
+    @counts_fallback
     def _fallback_interpretation(
         self, player_input: Optional[str], initiator: str, game_state: GameState
     ) -> dict:
@@ -370,22 +375,7 @@ Respond ONLY with valid JSON without any markdown or formatting:
                 'notable_changes': list[str]
             }
         """
-        # Format NPC responses for prompt
-        npc_reactions = []
-        for response in npc_responses:
-            reaction = f"{response['npc_name']}: "
-            if response.get("dialogue"):
-                reaction += f'Says: "{response["dialogue"]}"'
-            if response.get("action"):
-                if response.get("dialogue"):
-                    reaction += " AND "
-                reaction += f"Does: {response['action']}"
-            if not response.get("dialogue") and not response.get("action"):
-                reaction += "Observes silently"
-
-            npc_reactions.append(reaction)
-
-        npc_reactions_text = "\n".join(npc_reactions)
+        npc_reactions_text = self._format_npc_reactions(npc_responses)
 
         prompt = f"""
 WHAT HAPPENED (your interpretation):
@@ -427,6 +417,7 @@ Respond only with valid JSON:
             logger.info("GM synthesizing narrative")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="synthesize_narrative",
                 game_state=game_state,
                 response_schema={
                     "type": "object",
@@ -473,6 +464,25 @@ Respond only with valid JSON:
 
             return self._fallback_narrative(interpretation, npc_responses)
 
+    def _format_npc_reactions(self, npc_responses: List[dict]) -> str:
+        """Format NPC responses for the synthesis prompts"""
+        npc_reactions = []
+        for response in npc_responses:
+            reaction = f"{response['npc_name']}: "
+            if response.get("dialogue"):
+                reaction += f'Says: "{response["dialogue"]}"'
+            if response.get("action"):
+                if response.get("dialogue"):
+                    reaction += " AND "
+                reaction += f"Does: {response['action']}"
+            if not response.get("dialogue") and not response.get("action"):
+                reaction += "Observes silently"
+
+            npc_reactions.append(reaction)
+
+        return "\n".join(npc_reactions)
+
+    @counts_fallback
     def _fallback_narrative(
         self, interpretation: dict, npc_responses: List[dict]
     ) -> dict:
@@ -578,6 +588,10 @@ Respond only with valid JSON:
             logger.info("GM checking scene status")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="check_scene_status",
+                # an ending without an ending type is a confused answer
+                validator=lambda r: not r["approaching_ending"]
+                or r["ending_type"] != "null",
                 game_state=game_state,
                 response_schema={
                     "type": "object",
@@ -632,13 +646,208 @@ Respond only with valid JSON:
         except json.JSONDecodeError as e:
             logger.error(f"GM scene check JSON parse failed: {e}")
 
-            # Default scene fallback
+            return self._fallback_scene_status()
+
+    @counts_fallback
+    def _fallback_scene_status(self) -> dict:
+        """
+        Default scene status if JSON parsing fails
+        """
+        return {
+            "energy_assessment": "plateau",
+            "needs_stimulus": False,
+            "stimulus_suggestion": "",
+            "approaching_ending": False,
+            "ending_type": None,
+        }
+
+    async def synthesize_and_check_scene(
+        self, interpretation: dict, npc_responses: List[dict], game_state: GameState
+    ) -> dict:
+        """
+        Fused synthesize_narrative + check_scene_status in a single call
+
+        Both calls read almost the same context right after each other, so
+        fused mode saves a full round trip and a resend of the system prompt.
+
+        Args:
+            interpretation: GM's interpretation
+            npc_responses: List of NPC reaction dicts
+            game_state: Current game state
+
+        Returns:
+            dict: {
+                'narrative': dict (same shape as synthesize_narrative),
+                'scene_status': dict (same shape as check_scene_status)
+            }
+        """
+        npc_reactions_text = self._format_npc_reactions(npc_responses)
+
+        prompt = f"""
+WHAT HAPPENED (your interpretation):
+{interpretation["what_happens"]}
+
+NPC REACTIONS:
+{npc_reactions_text}
+
+SCENE PROGRESS:
+- Moment: {game_state.moment_count}
+- Tension: {game_state.tension_level}/10
+- Energy: {game_state.scene_energy}
+- Location {game_state.player_location}
+
+RECENT EVENTS:
+{game_state.get_recent_narrative(5)}
+
+NPC GOALS:
+{
+            json.dumps(
+                {
+                    npc_id: {
+                        "goal": npc.current_goal,
+                        "goal_status": npc.goal_status,
+                    }
+                    for npc_id, npc in game_state.npcs.items()
+                },
+                indent=2,
+            )
+        }
+
+You have two tasks.
+
+TASK 1 - NARRATIVE: Create a vivid, objective narrative that:
+1. Describes what happens from an omniscient perspective
+2. Integrates NPC reactions naturally and specifically
+3. Shows environmental details and consequences
+4. Maintains appropriate tension
+5. Sets up the next decision point clearly
+
+WRITING GUIDELINES:
+- Be concrete and specific (not "someone reacts" but "Frank slams his fist")
+- Use sensory details (sounds, sights, physical sensations)
+- Show, don't tell (not "Frank is angry" but "Frank's knuckles turn white")
+- Keep it objective; no interpretation, just what's visible/audible
+- Write in present tense for immediacy
+
+TASK 2 - SCENE ASSESSMENT, taking this moment into account:
+1. ENERGY: Is tension/action rising, flat, falling, or completely stalled?
+2. STIMULUS: Does the scene need external intervention? Only if truly stalled.
+3. ENDING: Is the scene naturally approaching a conclusion?
+    - Violence / Resolution / Departure / Stalemate, or null if it continues
+
+Respond only with valid JSON:
+{{
+    "narrative": "vivid, specific, objective prose description (3-5 sentences)",
+    "tension_level": 1-10,
+    "scene_energy": "building|plateau|climactic|resolving",
+    "notable_changes": ["specific", "state", "changes"],
+    "energy_assessment": "rising|plateau|falling|stalled",
+    "needs_stimulus": true/false,
+    "stimulus_suggestion": "what external event could inject energy (if needed)",
+    "approaching_ending": true/false,
+    "ending_type": "violence|resolution|departure|stalemate|null"
+}}
+"""
+        try:
+            logger.info("GM synthesizing narrative and checking scene (fused)")
+            response = await self._call_claude(
+                prompt=prompt,
+                call_type="synthesize_and_check_scene",
+                game_state=game_state,
+                response_schema={
+                    "type": "object",
+                    "properties": {
+                        "narrative": {
+                            "type": "string",
+                            "description": "Vivid, specific, objective prose description (3-5 sentences)",
+                        },
+                        "tension_level": {
+                            "type": "integer",
+                            "description": "Current tension level",
+                        },
+                        "scene_energy": {
+                            "type": "string",
+                            "enum": ["building", "plateau", "climactic", "resolving"],
+                            "description": "Current scene energy state",
+                        },
+                        "notable_changes": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Specific state changes",
+                        },
+                        "energy_assessment": {
+                            "type": "string",
+                            "enum": ["rising", "plateau", "falling", "stalled"],
+                            "description": "Current energy trend",
+                        },
+                        "needs_stimulus": {
+                            "type": "boolean",
+                            "description": "Whether external stimulus is needed",
+                        },
+                        "stimulus_suggestion": {
+                            "type": "string",
+                            "description": "What external event could inject energy",
+                        },
+                        "approaching_ending": {
+                            "type": "boolean",
+                            "description": "Whether scene is nearing conclusion",
+                        },
+                        "ending_type": {
+                            "type": "string",
+                            "enum": [
+                                "violence",
+                                "resolution",
+                                "departure",
+                                "stalemate",
+                                "null",
+                            ],
+                            "description": "Type of ending if approaching",
+                        },
+                    },
+                    "required": [
+                        "narrative",
+                        "tension_level",
+                        "scene_energy",
+                        "notable_changes",
+                        "energy_assessment",
+                        "needs_stimulus",
+                        "stimulus_suggestion",
+                        "approaching_ending",
+                        "ending_type",
+                    ],
+                    "additionalProperties": False,
+                },
+            )
+            result = json.loads(response)
+
+            logger.info(
+                f"GM narrative created (tension: {result['tension_level']}, energy: {result['scene_energy']}), "
+                f"scene status: {result['energy_assessment']}, ending: {result['approaching_ending']}"
+            )
+
+            return {
+                "narrative": {
+                    "narrative": result["narrative"],
+                    "tension_level": result["tension_level"],
+                    "scene_energy": result["scene_energy"],
+                    "notable_changes": result["notable_changes"],
+                },
+                "scene_status": {
+                    "energy_assessment": result["energy_assessment"],
+                    "needs_stimulus": result["needs_stimulus"],
+                    "stimulus_suggestion": result["stimulus_suggestion"],
+                    "approaching_ending": result["approaching_ending"],
+                    "ending_type": result["ending_type"],
+                },
+            }
+
+        except json.JSONDecodeError as e:
+            logger.error(f"GM fused synthesis JSON parse failed: {e}")
+            logger.error(f"Raw response: {response[:200]}...")
+
             return {
-                "energy_assessment": "plateau",
-                "needs_stimulus": False,
-                "stimulus_suggestion": "",
-                "approaching_ending": False,
-                "ending_type": None,
+                "narrative": self._fallback_narrative(interpretation, npc_responses),
+                "scene_status": self._fallback_scene_status(),
             }
 
     async def generate_stimulus(self, game_state: GameState) -> str:
@@ -690,6 +899,9 @@ Respond only with valid JSON:
             logger.info("GM generating stimulus")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="generate_stimulus",
+                # one short concrete sentence, anything else escalates
+                validator=lambda r: 0 < len(r["stimulus"].strip()) <= 300,
                 game_state=game_state,
                 response_schema={
                     "type": "object",
@@ -717,28 +929,36 @@ Respond only with valid JSON:
             return "A loud crash from outside makes everyone freeze."
 
     async def _call_claude(
-        self, prompt: str, game_state: GameState, response_schema: dict
+        self,
+        prompt: str,
+        call_type: str,
+        game_state: GameState,
+        response_schema: dict,
+        validator: Optional[Callable[[dict], bool]] = None,
     ) -> str:
         """
         Call Claude API wih GM's system prompt
 
         Args:
             prompt: User message (the specific question)
+            call_type: Which GM method is calling (selects profile settings)
             game_state: Current game state
+            validator: Optional sanity check, a failed check escalates the
+                call to a bigger model when the route is a cascade
 
         Returns:
             str: Claude's response
         """
         system_prompt = self.get_system_prompt(game_state)
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
+        result = await self.llm.call(
+            agent="gm",
+            call_type=call_type,
+            profile=self.profile,
             system=system_prompt,
-            messages=[{"role": "user", "content": prompt}],
-            output_config={
-                "format": {"type": "json_schema", "schema": response_schema}
-            },
+            prompt=prompt,
+            response_schema=response_schema,
+            validator=validator,
         )
 
-        return response.content[0].text
+        return result.text
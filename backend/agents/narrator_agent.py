@@ -1,20 +1,49 @@
-from anthropic import Anthropic
+import asyncio
 import json
 import logging
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
+
+from anthropic import APIError
 
 from backend.models.narrator_state import NarratorState
 from backend.models.game_state import GameState
+from backend.models.change_set import ChangeSet
+from backend.models.session_profile import SessionProfile
+from backend.llm.client import LLMClient, get_default_client
+from backend.metrics import counts_fallback
+from backend.text_similarity import content_words
 
 logger = logging.getLogger(__name__)
 
 class NarratorAgent:
     """Unrealiable narrator - filters GM's objective reality through a subjective lens"""
-    def __init__(self, narrator_state: NarratorState):
-        self.client = Anthropic()
-        self.model = "claude-sonnet-4-5-20250929"
+    def __init__(
+        self,
+        narrator_state: NarratorState,
+        profile: Optional[SessionProfile] = None,
+        llm: Optional[LLMClient] = None,
+        aside_min_tension: int = 7,
+        aside_cooldown: int = 2,
+        aside_budget: Optional[int] = None,
+    ):
+        self.llm = llm or get_default_client()
+        self.profile = profile or SessionProfile()
         self.narrator_state = narrator_state
 
+        # local gate in front of the aside LLM call
+        self.aside_min_tension = aside_min_tension
+        self.aside_cooldown = aside_cooldown  # moments between asides
+        self.aside_budget = aside_budget  # asides per session, None = unlimited
+        self._last_aside_moment: Optional[int] = None
+        self.aside_stats = {
+            "gated_low_tension": 0,
+            "gated_cooldown": 0,
+            "gated_budget": 0,
+            "gated_no_obsession": 0,
+            "calls": 0,
+            "produced": 0,
+        }
+
     def get_system_prompt(self) -> str:
         return f"""You are {self.narrator_state.name}, the narrator of this story.
 CRITICAL: You are not objective. You are a character with limitations and biases.set
@@ -58,11 +87,21 @@ NARRATIVE GUIDELINES:
 You are not a neutral observer. You are an unreliable narrator with an agenda and limitations.
 """
     
-    async def narrate_moment(self, gm_objective_facts: dict, npc_responses: List[dict], game_state: GameState) -> dict:
-        """Take objective GM synthesis and filter it through the narrator's lens"""
+    async def narrate_moment(self, gm_objective_facts: dict, npc_responses: List[dict], game_state: GameState, changes: Optional[ChangeSet] = None, debug: bool = True) -> dict:
+        """
+        Take objective GM synthesis and filter it through the narrator's lens
+
+        With a change set, the narrator's state update waits for its commit.
+        Without debug, the noticed/missed lists (only shown in the debug
+        view) are not asked for, saving their output tokens.
+        """
         # build what the narrator actually perceives
         perceived_facts = self._filter_by_perception(gm_objective_facts)
 
+        debug_fields = """
+    "what_you_noticed": ["key", "details", "you", "focused", "on"],
+    "what_you_missed": ["things", "you", "didn't", "notice"],""" if debug else ""
+
         prompt = f"""
 THE OBJECTIVE FACTS (what actually happened):
 {json.dumps(gm_objective_facts, indent=2)}
@@ -89,15 +128,13 @@ What you tell the player may not be the whole truth, but that's the point
 
 Repond only with valid JSON:
 {{
-    "narration": "your subjective, atmospheric narration to the player",
-    "what_you_noticed": ["key", "details", "you", "focused", "on"],
-    "what_you_missed": ["things", "you", "didn't", "notice"],
+    "narration": "your subjective, atmospheric narration to the player",{debug_fields}
     "your_interpretation": "what you think is really going on",
     "reliability_check": 1-10
 }}
 """
         try: 
-            response = await self._call_claude(prompt=prompt, 
+            response = await self._call_claude(prompt=prompt, call_type="narrate_moment",
                 response_schema = {
                     "type": "object",
                     "properties": {
@@ -126,31 +163,55 @@ Repond only with valid JSON:
                     },
                     "required": ["narration", "what_you_noticed", "what_you_missed", "your_interpretation", "reliability_check"],
                     "additionalProperties": False
+            } if debug else {
+                    "type": "object",
+                    "properties": {
+                        "narration": {"type": "string", "description": ""},
+                        "your_interpretation": {"type": "string", "description": ""},
+                        "reliability_check": {"type": "integer", "description": ""}
+                    },
+                    "required": ["narration", "your_interpretation", "reliability_check"],
+                    "additionalProperties": False
             })
             result = json.loads(response)
 
-            # update narrator state
-            self.narrator_state.knowledge.append(result['your_interpretation'])
-
-            # shift reliability based on events
-            self.narrator_state.reliability = result.get('reliability_check', self.narrator_state.reliability)
+            if changes is not None:
+                changes.defer(self.apply_narration, result)
+            else:
+                self.apply_narration(result)
 
-            logger.info(f"Narrator {self.narrator_state.name} narrated (reliability: {self.narrator_state.reliability})")
+            logger.info(f"Narrator {self.narrator_state.name} narrated (reliability: {result.get('reliability_check')})")
             return result
         
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse narrator output: {e}")
             return self._fallback_narration(gm_objective_facts)
         
-    async def narrator_aside(self, game_state: GameState) -> Optional[str]:
+    def apply_narration(self, result: dict):
+        """
+        Update narrator state from a narration result
+
+        Split out of narrate_moment so pre-generated narrations (opening pool)
+        can be applied to a fresh narrator without another API call
+        """
+        # update narrator state
+        self.narrator_state.knowledge.append(result['your_interpretation'])
+
+        # shift reliability based on events
+        self.narrator_state.reliability = result.get('reliability_check', self.narrator_state.reliability)
+
+    async def narrator_aside(self, game_state: GameState, changes: Optional[ChangeSet] = None) -> Optional[str]:
         """
         Sometimes narrator adds their own commentary unprompted
         Triggered by high tension or narrator's obsessions
+
+        With a change set, the aside only counts against the cooldown and
+        budget once the moment is committed
         """
         # only do this occassionally
-        if game_state.tension_level < 7:
+        if not self._aside_gate(game_state):
             return None
-        
+
         prompt = f"""
 The tension is HIGH ({game_state.tension_level}/10)
 
@@ -174,7 +235,9 @@ Respond only with valid JSON:
 """
         
         try:
-            response = await self._call_claude(prompt=prompt, response_schema = {
+            # "yes" without any text is a confused answer
+            validator = lambda r: not r["should_add_aside"] or bool(r["aside_text"].strip())
+            response = await self._call_claude(prompt=prompt, call_type="narrator_aside", validator=validator, response_schema = {
                 "type": "object",
                 "properties": {
                     "should_add_aside": {
@@ -184,19 +247,78 @@ Respond only with valid JSON:
                     "aside_text": {
                         "type": "string",
                         "description": ""
-                    },
-                    "required": ["should_add_aside"],
-                    "additionalProperties": False
-                }
+                    }
+                },
+                "required": ["should_add_aside", "aside_text"],
+                "additionalProperties": False
             })
             result = json.loads(response)
 
-            if result.get('should_add_aside'):
+            if result.get('should_add_aside') and result.get('aside_text'):
+                if changes is not None:
+                    changes.defer(self.record_aside, game_state.moment_count)
+                else:
+                    self.record_aside(game_state.moment_count)
                 return result.get('aside_text')
             return None
         
-        except:
-            return None
+        # ValueError covers json.JSONDecodeError; anything else is a bug
+        except (APIError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Narrator aside failed ({e.__class__.__name__}: {e})")
+            return self._fallback_aside()
+
+    def record_aside(self, moment: int):
+        """Count an aside given at `moment` against the cooldown and budget"""
+        self._last_aside_moment = moment
+        self.aside_stats["produced"] += 1
+        logger.info(f"Narrator aside produced (stats: {self.aside_stats})")
+
+    def aside_checkpoint(self) -> Tuple[Optional[int], int]:
+        """Cooldown and budget state, for rewinds and branches"""
+        return self._last_aside_moment, self.aside_stats["produced"]
+
+    def restore_asides(self, checkpoint: Tuple[Optional[int], int]):
+        self._last_aside_moment, self.aside_stats["produced"] = checkpoint
+
+    def _aside_gate(self, game_state: GameState) -> bool:
+        """
+        Cheap local check before spending an LLM call on an aside
+
+        An aside is only attempted when tension is high, the cooldown since the
+        last aside has passed, the session budget is not spent, and one of the
+        narrator's obsessions shows up in the recent events
+        """
+        if game_state.tension_level < self.aside_min_tension:
+            reason = "gated_low_tension"
+        elif (
+            self._last_aside_moment is not None
+            and game_state.moment_count - self._last_aside_moment <= self.aside_cooldown
+        ):
+            reason = "gated_cooldown"
+        elif self.aside_budget is not None and self.aside_stats["produced"] >= self.aside_budget:
+            reason = "gated_budget"
+        elif not self._obsession_in_recent_events(game_state):
+            reason = "gated_no_obsession"
+        else:
+            self.aside_stats["calls"] += 1
+            return True
+
+        self.aside_stats[reason] += 1
+        logger.info(f"Narrator aside skipped: {reason}")
+        return False
+
+    def _obsession_in_recent_events(self, game_state: GameState) -> bool:
+        """Does anything the narrator obsesses over appear in the last few events?"""
+        event_words = content_words(game_state.get_recent_narrative(3))
+
+        for obsession in self.narrator_state.obsessions:
+            for word in content_words(obsession):
+                # crude stemming: "guilt" matches "guilty", "power" matches "powerless"
+                stem = word[:5]
+                if any(event_word.startswith(stem) for event_word in event_words):
+                    return True
+
+        return False
         
     def _filter_by_perception(self, objective_facts: dict) -> dict:
         """
@@ -212,6 +334,7 @@ Respond only with valid JSON:
 
         return filtered
     
+    @counts_fallback
     def _fallback_narration(self, gm_facts: dict) -> dict:
         """Fallback if API fails"""
         return {
@@ -221,27 +344,30 @@ Respond only with valid JSON:
             "your_interpretation": "Unclear",
             "reliability_check": 5
         }
+
+    @counts_fallback
+    def _fallback_aside(self) -> Optional[str]:
+        """No aside if the call fails, the moment doesn't need one"""
+        return None
     
-    async def _call_claude(self, prompt: str, response_schema: dict) -> str:
-        """Call Claude with narrator's system prompt"""
+    async def _call_claude(
+        self,
+        prompt: str,
+        call_type: str,
+        response_schema: dict,
+        validator: Optional[Callable[[dict], bool]] = None,
+    ) -> str:
+        """Call Claude with narrator's system prompt through the shared call layer"""
         system_prompt = self.get_system_prompt()
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1500,
+        result = await self.llm.call(
+            agent="narrator",
+            call_type=call_type,
+            profile=self.profile,
             system=system_prompt,
-            messages=[
-                {
-                    "role": "user", 
-                    "content": prompt
-                    }
-            ],
-            output_config={
-                "format": {
-                    "type": "json_schema",
-                    "schema": response_schema
-                }
-            }
+            prompt=prompt,
+            response_schema=response_schema,
+            validator=validator,
         )
 
-        return response.content[0].text
\ No newline at end of file
+        return result.text
@@ -1,10 +1,13 @@
-from anthropic import Anthropic
 import json
 import logging
 from typing import Dict, Optional
 
 from backend.models.npc_state import NPCState
 from backend.models.game_state import GameState
+from backend.models.change_set import ChangeSet
+from backend.models.session_profile import SessionProfile
+from backend.llm.client import LLMClient, get_default_client
+from backend.metrics import counts_fallback
 
 logger = logging.getLogger(__name__)
 
@@ -23,16 +26,24 @@ class NPCAgent:
     Key principle: NPCs are separate entities, not extensions of the GM
     """
 
-    def __init__(self, npc_state: NPCState):
+    def __init__(
+        self,
+        npc_state: NPCState,
+        profile: Optional[SessionProfile] = None,
+        llm: Optional[LLMClient] = None,
+    ):
         """
         Initialize NPC agent
 
         Args:
             npc_state: The NPC's state (personality, goals, knowledge, etc.)
+            profile: Session profile (models, token caps, timeouts per call)
+            llm: Shared call layer (model routing, stats)
         """
-        self.client = Anthropic()
-        self.model = "claude-haiku-4-5-20251001"
+        self.llm = llm or get_default_client()
+        self.profile = profile or SessionProfile()
         self.npc_state = npc_state
+        self.last_usage = None  # token usage of the most recent call
 
         logger.info(f"NPC Agent initialized: {npc_state.name}")
 
@@ -123,7 +134,12 @@ STAY IN CHARACTER AT ALL TIMES.
 Always respond in valid JSON format.
 """
 
-    async def respond_to_moment(self, context: str, game_state: GameState) -> dict:
+    async def respond_to_moment(
+        self,
+        context: str,
+        game_state: GameState,
+        changes: Optional[ChangeSet] = None,
+    ) -> dict:
         """
         NPC responds to something that just happened
 
@@ -136,6 +152,8 @@ Always respond in valid JSON format.
         Args:
             context: What the NPC perceives (from GM)
             game_states: Current game state
+            changes: The moment's change set; the NPC's state update is
+                deferred to its commit (applied right away if None)
 
         Returns:
             dict: {
@@ -199,15 +217,16 @@ Respond only with valid JSON:
             logger.info(f"{self.npc_state.name} processing response")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="respond_to_moment",
                 response_schema={
                     "type": "object",
                     "properties": {
                         "dialogue": {
-                            "type": "string",
+                            "type": ["string", "null"],
                             "description": "What you say, or null if silent",
                         },
                         "action": {
-                            "type": "string",
+                            "type": ["string", "null"],
                             "description": "What you do physically, or null",
                         },
                         "internal_thought": {
@@ -236,22 +255,7 @@ Respond only with valid JSON:
             )
             result = json.loads(response)
 
-            # add NPC identification
-            result["npc_id"] = self.npc_state.npc_id
-            result["npc_name"] = self.npc_state.name
-
-            # update NPC state based on response
-            self._update_state_from_response(result)
-
-            # log what the NPC did
-            if result.get("dialogue"):
-                logger.info(f' {self.npc_state.name} says: "{result["dialogue"][:60]}"')
-            elif result.get("action"):
-                logger.info(f' {self.npc_state.name} does: {result["action"][:60]}"')
-            else:
-                logger.info(f" {self.npc_state.name} observes silently")
-
-            return result
+            return self.apply_response(result, changes)
 
         except json.JSONDecodeError as e:
             logger.error(f"{self.npc_state.name} response JSON  parse failed: {e}")
@@ -259,29 +263,73 @@ Respond only with valid JSON:
 
             return self._fallback_response()
 
-    def _update_state_from_response(self, response: dict):
+    def apply_response(
+        self, result: dict, changes: Optional[ChangeSet] = None
+    ) -> dict:
+        """
+        Tag a parsed response with this NPC's identity and update their state
+
+        Shared by respond_to_moment and the ensemble agent, which produces
+        several NPCs' responses in one call
+
+        Args:
+            result: The parsed response dict (dialogue, action, emotion, ...)
+            changes: Defer the state update to this change set's commit
+
+        Returns:
+            dict: The same response with npc_id and npc_name added
+        """
+        # add NPC identification
+        result["npc_id"] = self.npc_state.npc_id
+        result["npc_name"] = self.npc_state.name
+
+        # update NPC state based on response
+        if changes is not None:
+            changes.defer_npc(
+                self.npc_state.npc_id, self._update_state_from_response, result
+            )
+        else:
+            self._update_state_from_response(result)
+
+        # log what the NPC did
+        if result.get("dialogue"):
+            logger.info(f' {self.npc_state.name} says: "{result["dialogue"][:60]}"')
+        elif result.get("action"):
+            logger.info(f' {self.npc_state.name} does: {result["action"][:60]}"')
+        else:
+            logger.info(f" {self.npc_state.name} observes silently")
+
+        return result
+
+    def _update_state_from_response(
+        self, response: dict, npc_state: Optional[NPCState] = None
+    ):
         """
         Update NPC's internal state based on their response
 
         Args:
             response: The NPC's response dict
+            npc_state: The state to update (default: this agent's)
         """
+        npc_state = npc_state or self.npc_state
+
         # update emotional state
         if response.get("emotional_state"):
-            self.npc_state.emotional_state = response["emotional_state"]
+            npc_state.emotional_state = response["emotional_state"]
 
         # update urgency
         urgency_change = response.get("urgency_change", 0)
-        self.npc_state.urgency_level = max(
-            1, min(10, self.npc_state.urgency_level + urgency_change)
+        npc_state.urgency_level = max(
+            1, min(10, npc_state.urgency_level + urgency_change)
         )
 
         # track last action
         if response.get("dialogue"):
-            self.npc_state.last_action = f'Said: "{response["dialogue"]}"'
+            npc_state.last_action = f'Said: "{response["dialogue"]}"'
         elif response.get("action"):
-            self.npc_state.last_action = response["action"]
+            npc_state.last_action = response["action"]
 
+    @counts_fallback
     def _fallback_response(self) -> dict:
         """
         Fallback response if API call fails
@@ -294,7 +342,7 @@ Respond only with valid JSON:
         return {
             "npc_id": self.npc_state.npc_id,
             "npc_name": self.npc_state.name,
-            "dialogue": self.npc_state.dialogue,
+            "dialogue": None,
             "action": f"{self.npc_state.name} watches tensely",
             "internal_thought": "Trying to assess the situation",
             "emotional_state": self.npc_state.emotional_state,
@@ -368,6 +416,7 @@ Respond only with valid JSON:
             logger.info(f"Checking if {self.npc_state.name} wants initiative")
             response = await self._call_claude(
                 prompt=prompt,
+                call_type="check_initiative",
                 response_schema={
                     "type": "object",
                     "properties": {
@@ -404,26 +453,29 @@ Respond only with valid JSON:
             logger.error(f"{self.npc_state.name} initiative check failed: {e}")
             return None
 
-    async def _call_claude(self, prompt: str, response_schema: dict) -> str:
+    async def _call_claude(
+        self, prompt: str, call_type: str, response_schema: dict
+    ) -> str:
         """
         Call Claude API with NPC's system prompt
 
         Args:
             prompt: User message (specific question/situation)
+            call_type: Which NPC method is calling (selects profile settings)
 
         Returns:
             str: Claude's response (should be JSON)
         """
         system_prompt = self.get_system_prompt()
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=800,
+        result = await self.llm.call(
+            agent="npc",
+            call_type=call_type,
+            profile=self.profile,
             system=system_prompt,
-            messages=[{"role": "user", "content": prompt}],
-            output_config={
-                "format": {"type": "json_schema", "schema": response_schema}
-            },
+            prompt=prompt,
+            response_schema=response_schema,
         )
+        self.last_usage = result.usage
 
-        return response.content[0].text
+        return result.text
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional
+
+from backend.models.game_state import GameState
+from backend.models.change_set import ChangeSet
+from backend.models.session_profile import SessionProfile
+from backend.llm.client import LLMClient, get_default_client
+from backend.agents.npc_agent import NPCAgent
+
+logger = logging.getLogger(__name__)
+
+
+class NPCEnsembleAgent:
+    """
+    Ensemble NPC Agent - one call for a small cast
+
+    For 2-4 affected NPCs, a separate call per NPC repeats the shared context
+    and adds its own tail-latency risk. The ensemble agent asks for every
+    affected NPC's reaction in one structured call instead.
+
+    Information isolation still holds inside the prompt:
+    - Each NPC's full system prompt is included in its own sealed block
+    - The model is told that a character may only use their own block
+    - Responses are applied through each NPC's own agent (same state updates)
+
+    Any NPC missing from the ensemble answer falls back to its own call.
+    """
+
+    def __init__(
+        self,
+        npc_agents: Dict[str, NPCAgent],
+        profile: Optional[SessionProfile] = None,
+        llm: Optional[LLMClient] = None,
+    ):
+        """
+        Initialize ensemble agent
+
+        Args:
+            npc_agents: The individual NPC agents, keyed by npc_id
+            profile: Session profile (models, token caps, timeouts per call)
+            llm: Shared call layer (model routing, stats)
+        """
+        self.llm = llm or get_default_client()
+        self.profile = profile or SessionProfile()
+        self.npc_agents = npc_agents
+        self.last_usage = None  # token usage of the most recent call
+
+    def get_system_prompt(self, npc_ids: List[str]) -> str:
+        """
+        Ensemble system prompt - one sealed block per character
+
+        Args:
+            npc_ids: The NPCs responding this moment
+
+        Returns:
+            str: System prompt containing every character's private prompt
+        """
+        character_blocks = "\n\n".join(
+            [
+                f'<character id="{npc_id}">\n'
+                f"{self.npc_agents[npc_id].get_system_prompt()}\n"
+                f"</character>"
+                for npc_id in npc_ids
+            ]
+        )
+
+        return f"""You are playing several characters in an emergent story at once.
+Each character is described in their own <character> block below, written to them in the second person.
+
+INFORMATION ISOLATION (never break this):
+1. A character's reaction may ONLY use what is in their own <character> block
+2. A character never knows another character's secrets, goals, knowledge or thoughts
+3. Characters only perceive each other through what is said and done out loud
+4. Write each character as if the other blocks did not exist
+
+{character_blocks}
+
+Always respond in valid JSON format.
+"""
+
+    async def respond_to_moment(
+        self,
+        context: str,
+        npc_ids: List[str],
+        game_state: GameState,
+        changes: Optional[ChangeSet] = None,
+    ) -> List[dict]:
+        """
+        Every listed NPC responds to something that just happened, in one call
+
+        Args:
+            context: What the NPCs perceive (from GM)
+            npc_ids: Which NPCs respond
+            game_state: Current game state
+            changes: The moment's change set (see NPCAgent.apply_response)
+
+        Returns:
+            list[dict]: One NPCAgent.respond_to_moment-shaped dict per NPC,
+                in the order of npc_ids
+        """
+        present = {
+            npc_id: [
+                npc.name
+                for other_id, npc in game_state.npcs.items()
+                if other_id != npc_id
+                and npc.location == self.npc_agents[npc_id].npc_state.location
+            ]
+            for npc_id in npc_ids
+        }
+        per_character = "\n".join(
+            [
+                f"- {npc_id} ({self.npc_agents[npc_id].npc_state.name}): "
+                f"urgency {self.npc_agents[npc_id].npc_state.urgency_level}/10, "
+                f"others present: {', '.join(present[npc_id]) or 'just them and the player'}"
+                for npc_id in npc_ids
+            ]
+        )
+
+        prompt = f"""
+WHAT JUST HAPPENED (every listed character perceives this):
+{context}
+
+CHARACTERS RESPONDING:
+{per_character}
+
+How does EACH character respond, independently and from their own block only?
+
+For each character consider:
+- Does this help or hurt their goal?
+- How does this make them feel?
+- Should they reveal information or hide it?
+- Should they escalate or de-escalate?
+
+Be specific. No "I react" but "I slam my fist on the table."
+React emotionally. They are not robots.
+
+Respond only with valid JSON, one entry per character:
+{{
+    "responses": [
+        {{
+            "npc_id": "which character",
+            "dialogue": "what they say, in quotes (or null if silent)",
+            "action": "what they do physically (or null if nothing)",
+            "internal_thought": "their private reasoning (not visible to others)",
+            "emotional_state": "their current emotion",
+            "urgency_change": -2 to +2,
+            "wants_to_act_next": true/false
+        }}
+    ]
+}}
+"""
+        try:
+            logger.info(f"Ensemble processing responses for {npc_ids}")
+            response = await self._call_claude(
+                npc_ids=npc_ids,
+                prompt=prompt,
+                response_schema={
+                    "type": "object",
+                    "properties": {
+                        "responses": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "npc_id": {"type": "string", "enum": npc_ids},
+                                    # null when silent / not doing anything
+                                    "dialogue": {"type": ["string", "null"]},
+                                    "action": {"type": ["string", "null"]},
+                                    "internal_thought": {"type": "string"},
+                                    "emotional_state": {"type": "string"},
+                                    "urgency_change": {"type": "integer"},
+                                    "wants_to_act_next": {"type": "boolean"},
+                                },
+                                "required": [
+                                    "npc_id",
+                                    "dialogue",
+                                    "action",
+                                    "internal_thought",
+                                    "emotional_state",
+                                    "urgency_change",
+                                    "wants_to_act_next",
+                                ],
+                                "additionalProperties": False,
+                            },
+                        }
+                    },
+                    "required": ["responses"],
+                    "additionalProperties": False,
+                },
+            )
+            by_npc = {
+                item["npc_id"]: item for item in json.loads(response)["responses"]
+            }
+
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"Ensemble response JSON parse failed: {e}")
+            by_npc = {}
+
+        results = []
+        missing = []
+        for npc_id in npc_ids:
+            if npc_id in by_npc:
+                result = dict(by_npc[npc_id])
+                result.pop("npc_id")
+                results.append(
+                    self.npc_agents[npc_id].apply_response(result, changes)
+                )
+            else:
+                missing.append(npc_id)
+                results.append(None)
+
+        if missing:
+            # anyone the ensemble skipped gets their own call
+            logger.warning(f"Ensemble missed {missing}, falling back to individual calls")
+            fallbacks = await asyncio.gather(
+                *[
+                    self.npc_agents[npc_id].respond_to_moment(
+                        context, game_state, changes
+                    )
+                    for npc_id in missing
+                ]
+            )
+            individual = dict(zip(missing, fallbacks))
+            results = [
+                result if result is not None else individual[npc_id]
+                for npc_id, result in zip(npc_ids, results)
+            ]
+
+        return results
+
+    async def _call_claude(
+        self, npc_ids: List[str], prompt: str, response_schema: dict
+    ) -> str:
+        """
+        Call Claude API with the ensemble system prompt
+
+        Args:
+            npc_ids: The NPCs responding (sizes the system prompt and output cap)
+            prompt: User message (the shared situation)
+
+        Returns:
+            str: Claude's response (should be JSON)
+        """
+        system_prompt = self.get_system_prompt(npc_ids)
+
+        result = await self.llm.call(
+            agent="npc",
+            call_type="ensemble_respond",
+            profile=self.profile,
+            system=system_prompt,
+            prompt=prompt,
+            response_schema=response_schema,
+            # the cap is per NPC, the ensemble answers for all of them
+            max_tokens=self.profile.max_tokens_for("npc", "ensemble_respond")
+            * len(npc_ids),
+        )
+        self.last_usage = result.usage
+
+        return result.text
@@ -0,0 +1,136 @@
+# backend/deadline.py
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from anthropic import APIError
+
+from backend.llm.client import current_deadline
+from backend.metrics import STAGE_SECONDS
+from backend.server_timing import record_timing
+from backend.tracing import TRACER, Span
+
+logger = logging.getLogger(__name__)
+
+# position of each critical-path stage; later stages get time reserved
+STAGE_ORDER = {
+    "interpret_moment": 0,
+    "respond_to_moment": 1,
+    "ensemble_respond": 1,
+    "synthesize_narrative": 2,
+    "synthesize_and_check_scene": 2,
+    "narrate_moment": 3,
+}
+
+
+class MomentBudget:
+    """
+    Latency budget for one moment, handed to each stage as a deadline
+
+    Critical-path stages (interpret -> NPCs -> synthesize -> narrate) must
+    finish early enough to leave their reserved share of the budget to the
+    stages after them. Optional stages (aside, scene check, stimulus) get
+    whatever is left of the whole budget.
+
+    A stage that runs past its deadline, or whose API call fails, is
+    cancelled and replaced by its fallback, and recorded in `degraded`.
+    The deadline is also published to the call layer so a cascade does not
+    start another attempt it cannot finish.
+
+    Each stage is a span of the moment's trace; the LLM calls it makes
+    become its children.
+    """
+
+    def __init__(self, total_seconds: float, reserve_fractions: Dict[str, float]):
+        self.started = time.monotonic()
+        self.deadline = self.started + total_seconds
+        self.reserve_seconds = {
+            stage: fraction * total_seconds
+            for stage, fraction in reserve_fractions.items()
+        }
+        self.degraded: List[str] = []
+
+    def deadline_for(self, stage: str) -> float:
+        """Monotonic time by which a stage has to be done"""
+        position = STAGE_ORDER.get(stage)
+        if position is None:
+            return self.deadline
+
+        reserved = sum(
+            seconds
+            for later, seconds in self.reserve_seconds.items()
+            if STAGE_ORDER.get(later, -1) > position
+        )
+        return self.deadline - reserved
+
+    async def run(
+        self,
+        stage: str,
+        coro: Awaitable,
+        fallback: Callable[[], Any],
+        label: Optional[str] = None,
+    ) -> Any:
+        """
+        Await a stage within its deadline, falling back if it cannot make it
+
+        Args:
+            stage: Stage name (see STAGE_ORDER, anything else is optional)
+            coro: The stage's coroutine
+            fallback: Called for a degraded result if the stage misses its
+                deadline or its API call fails
+            label: Name reported in `degraded` (defaults to the stage)
+
+        Returns:
+            The stage's result, or the fallback's
+        """
+        label = label or stage
+        with TRACER.span(label, stage=stage) as span:
+            return await self._run(stage, coro, fallback, label, span)
+
+    async def _run(
+        self,
+        stage: str,
+        coro: Awaitable,
+        fallback: Callable[[], Any],
+        label: str,
+        span: Span,
+    ) -> Any:
+        deadline = self.deadline_for(stage)
+        remaining = deadline - time.monotonic()
+        span.set(deadline_seconds=round(remaining, 3))
+
+        if remaining <= 0:
+            coro.close()
+            logger.warning(f"Moment budget spent, skipping {label}")
+            self._observe(stage, label, "skipped", 0.0, span)
+            self.degraded.append(label)
+            return fallback()
+
+        token = current_deadline.set(deadline)
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(coro, timeout=remaining)
+            self._observe(stage, label, "ok", time.monotonic() - start, span)
+            return result
+        except asyncio.TimeoutError:
+            logger.warning(f"{label} missed its deadline ({remaining:.1f}s), using fallback")
+        except APIError as e:
+            logger.error(f"{label} failed ({e.__class__.__name__}), using fallback")
+        finally:
+            current_deadline.reset(token)
+
+        self._observe(stage, label, "degraded", time.monotonic() - start, span)
+        self.degraded.append(label)
+        return fallback()
+
+    @staticmethod
+    def _observe(stage: str, label: str, outcome: str, seconds: float, span: Span):
+        """Report a finished stage to metrics, its trace span and Server-Timing"""
+        STAGE_SECONDS.observe(seconds, stage=stage, outcome=outcome)
+        span.set(outcome=outcome)
+        record_timing(label, seconds, None if outcome == "ok" else outcome)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
@@ -2,34 +2,98 @@
 
 import asyncio
 import logging
-from typing import List, Dict, Optional
+import time
+from dataclasses import replace
+from typing import Iterable, List, Dict, Optional, Tuple
 
 from backend.models.game_state import GameState
-from backend.models.npc_state import NPCState
+from backend.models.change_set import ChangeSet
 from backend.models.narrator_state import NarratorState
+from backend.models.session_profile import SessionProfile
 
 from backend.agents.gm_agent import GMAgent
 from backend.agents.npc_agent import NPCAgent
+from backend.agents.npc_ensemble_agent import NPCEnsembleAgent
 from backend.agents.narrator_agent import NarratorAgent
 
-from config import SCENARIO, NARRATOR
+from backend.pools.opening_pool import OpeningScenePool
+from backend.pools.stimulus_pool import StimulusPool
+from backend.pacing import PacingEstimator
+from backend.deadline import MomentBudget
+from backend.state_delta import StateVersions
+from backend.views import DEFAULT_VIEW, VIEWS, View, project
+from backend.metrics import MOMENT_SECONDS
+from backend.tracing import TRACER
+from backend.server_timing import timed
+from backend.llm.client import get_client
+from backend.llm.scheduling import current_session
+
+from config import (
+    SCENARIO,
+    NARRATOR,
+    NARRATOR_ASIDE,
+    NPC_ENSEMBLE,
+    STIMULUS_POOL,
+    PACING,
+    MOMENT_BUDGET_RESERVES,
+    STATE_DELTA,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class MomentInFlight(Exception):
+    """The session is already playing a moment, one runs at a time"""
+
+
 class OrganicMultiAgentEngine:
     """
     Core game orchestrator
     """
 
-    def __init__(self, api_keys: Optional[List[str]] = None):
-        # api_keys kept for future use, not required right now
+    def __init__(
+        self,
+        api_keys: Optional[List[str]] = None,
+        opening_pool: Optional[OpeningScenePool] = None,
+        profile: Optional[SessionProfile] = None,
+        session_id: Optional[str] = None,
+    ):
+        # API keys the session's calls are spread over (default: environment)
         self.api_keys = api_keys or []
+        self.session_id = session_id
+        self.llm = get_client(self.api_keys)
+
+        # models, token caps, timeouts and optional stages for this session
+        self.profile = profile or SessionProfile()
+
+        # "split": synthesize_narrative + check_scene_status as two calls
+        # "fused": one synthesize_and_check_scene call per moment (split when
+        # the profile turns the LLM scene check off)
+        self.gm_mode = self.profile.gm_mode
+
+        # pre-generated openings, start_game falls back to live generation
+        self.opening_pool = opening_pool
 
         self.state: Optional[GameState] = None
         self.gm_agent: Optional[GMAgent] = None
         self.narrator_agent: Optional[NarratorAgent] = None
         self.npc_agents: Dict[str, NPCAgent] = {}
+        self.npc_ensemble_agent: Optional[NPCEnsembleAgent] = None
+        self.stimulus_pool: Optional[StimulusPool] = None
+        self.pacing: Optional[PacingEstimator] = None
+
+        # end-of-moment snapshots (O(1) forks) for rewind and branches:
+        # state, narrator state, narrator knowledge length, aside cooldown and
+        # budget, pacing history checkpoint
+        self.checkpoints: Dict[
+            int, Tuple[GameState, NarratorState, int, tuple, Optional[tuple]]
+        ] = {}
+        self._moment_in_flight = False
+        # moments committed so far (did a failed request's moment land?)
+        self.commits = 0
+
+        # state version per change, responses carry deltas against it
+        self.versions = StateVersions(keep=STATE_DELTA["keep_versions"])
 
         logger.info("Game engine initialized")
 
@@ -37,16 +101,84 @@ class OrganicMultiAgentEngine:
     # GAME INITIALIZATION
     # =========================================================================
 
-    async def start_game(self) -> dict:
+    async def start_game(
+        self, view: View = VIEWS[DEFAULT_VIEW], fields: Optional[Iterable[str]] = None
+    ) -> dict:
         logger.info("=" * 60)
         logger.info("STARTING NEW GAME")
         logger.info("=" * 60)
 
+        # tag this request's LLM calls (each request runs in its own context)
+        current_session.set(self.session_id)
+
+        with TRACER.span("start_game", session_id=self.session_id):
+            return await self._start_game(view, fields)
+
+    async def _start_game(self, view: View, fields: Optional[Iterable[str]]) -> dict:
+        if self.stimulus_pool:
+            await self.stimulus_pool.stop()
+
         self.state = self._create_game_state_from_config()
         narrator_state = self._create_narrator_from_config()
         self._initialize_agents(narrator_state)
 
-        opening = await self.gm_agent.generate_opening_scene(self.state)
+        pooled = (
+            self.opening_pool.take(self.state.scenario_name)
+            if self.opening_pool
+            else None
+        )
+
+        if pooled:
+            opening = pooled["opening"]
+            self._apply_opening(opening)
+            narrator_output = pooled["narrator_output"]
+            self.narrator_agent.apply_narration(narrator_output)
+        else:
+            with (
+                TRACER.span("generate_opening_scene", stage="generate_opening_scene"),
+                timed("generate_opening_scene"),
+            ):
+                opening = await self.gm_agent.generate_opening_scene(self.state)
+            self._apply_opening(opening)
+            with (
+                TRACER.span("narrate_opening", stage="narrate_opening"),
+                timed("narrate_opening"),
+            ):
+                narrator_output = await self.narrator_agent.narrate_moment(
+                    {
+                        "what_happens": opening.get("player_intro", ""),
+                        "tension": self.state.tension_level,
+                        "energy": self.state.scene_energy,
+                    },
+                    [],
+                    self.state,
+                    debug=view.shows("debug", fields),
+                )
+
+        self.checkpoints = {}
+        self._checkpoint()
+        self.versions.bump()
+
+        result = {
+            "scenario_name": self.state.scenario_name,
+            "narrator_name": narrator_state.name,
+            "player_role": self.state.player_role,
+            "narrator_intro": narrator_output.get("narration", ""),
+            "opening_scene": opening.get("player_intro", ""),
+            "player_instructions": opening.get("player_instructions", ""),
+            "suggested_actions": opening.get("suggested_actions", []),
+        }
+        if view.shows("state", fields):
+            result.update(self._encode_state(view))
+        if view.shows("debug", fields):
+            result["debug"] = {
+                "gm_private_notes": opening.get("gm_private_notes", ""),
+                "narrator_briefing": opening.get("narrator_briefing", ""),
+            }
+        return project(result, view, fields)
+
+    def _apply_opening(self, opening: dict):
+        """Apply a GM opening (live or pre-generated) to the fresh game state"""
         self.state.tension_level = opening.get(
             "initial_tension_level", self.state.tension_level
         )
@@ -66,7 +198,7 @@ class OrganicMultiAgentEngine:
             npc_id = item.get("npc_id")
             briefing = item.get("briefing")
             if npc_id in self.state.npcs and briefing:
-                self.state.npcs[npc_id].knowledge.append(f"[Scene start] {briefing}")
+                self.state.npc_for_write(npc_id).remember(f"[Scene start] {briefing}")
 
         self.state.log_event(
             event_type="gm_stimulus",
@@ -76,80 +208,52 @@ class OrganicMultiAgentEngine:
             participants=["player"] + list(self.state.npcs.keys()),
         )
 
-        narrator_output = await self.narrator_agent.narrate_moment(
-            {
-                "what_happens": opening.get("player_intro", ""),
-                "tension": self.state.tension_level,
-                "energy": self.state.scene_energy,
-            },
-            [],
-            self.state,
-        )
-
-        return {
-            "scenario_name": self.state.scenario_name,
-            "narrator_name": narrator_state.name,
-            "player_role": self.state.player_role,
-            "narrator_intro": narrator_output.get("narration", ""),
-            "opening_scene": opening.get("player_intro", ""),
-            "player_instructions": opening.get("player_instructions", ""),
-            "suggested_actions": opening.get("suggested_actions", []),
-            "state": self.state.to_public_dict()
-            if hasattr(self.state, "to_public_dict")
-            else self.state.to_dict(),
-            "debug": {
-                "gm_private_notes": opening.get("gm_private_notes", ""),
-                "narrator_briefing": opening.get("narrator_briefing", ""),
-            },
-        }
-
     def _create_game_state_from_config(self) -> GameState:
-        state = GameState(
-            scenario_name=SCENARIO["name"],
-            situation_description=SCENARIO["situation"],
-            player_role=SCENARIO["player_role"],
-        )
-
-        for npc_config in SCENARIO["npcs"]:
-            npc = NPCState(
-                npc_id=npc_config["id"],
-                name=npc_config["name"],
-                personality=npc_config["personality"],
-                current_goal=npc_config["goal"],
-                secrets=npc_config["secrets"],
-                urgency_level=npc_config["starting_urgency"],
-            )
-            state.npcs[npc.npc_id] = npc
-
-        state.log_event(
-            event_type="gm_stimulus",
-            actor="environment",
-            description="The situation begins.",
-            location=state.player_location,
-        )
-
-        return state
+        return GameState.from_scenario(SCENARIO)
 
     def _create_narrator_from_config(self) -> NarratorState:
-        return NarratorState(
-            narrator_id=NARRATOR["style"],
-            name=NARRATOR["name"],
-            personality=NARRATOR["personality"],
-            narrative_style=NARRATOR["voice"],
-            blind_spots=NARRATOR["blind_spots"],
-            obsessions=NARRATOR["obsessions"],
-            misbeliefs=NARRATOR.get("misbeliefs", []),
-            reliability=NARRATOR["starting_reliability"],
-        )
+        return NarratorState.from_config(NARRATOR)
 
     def _initialize_agents(self, narrator_state: NarratorState):
-        self.gm_agent = GMAgent()
-        self.narrator_agent = NarratorAgent(narrator_state)
+        self.gm_agent = GMAgent(self.profile, self.llm)
+        self.narrator_agent = NarratorAgent(
+            narrator_state,
+            profile=self.profile,
+            llm=self.llm,
+            aside_min_tension=NARRATOR_ASIDE["min_tension"],
+            aside_cooldown=NARRATOR_ASIDE["cooldown_moments"],
+            aside_budget=NARRATOR_ASIDE["budget"],
+        )
 
         self.npc_agents = {}
         for npc_id, npc_state in self.state.npcs.items():
-            self.npc_agents[npc_id] = NPCAgent(npc_state)
+            self.npc_agents[npc_id] = NPCAgent(npc_state, self.profile, self.llm)
             logger.info(f"Created NPC agent: {npc_state.name}")
+        self.npc_ensemble_agent = NPCEnsembleAgent(
+            self.npc_agents, self.profile, self.llm
+        )
+
+        self.stimulus_pool = (
+            StimulusPool(
+                self.gm_agent,
+                depth=STIMULUS_POOL["depth"],
+                drift_threshold=STIMULUS_POOL["drift_threshold"],
+            )
+            if STIMULUS_POOL["enabled"]
+            and self.profile.stage_enabled("generate_stimulus")
+            else None
+        )
+
+        self.pacing = (
+            PacingEstimator(
+                check_every=PACING["check_every"],
+                confidence_threshold=PACING["confidence_threshold"],
+                stall_moments=PACING["stall_moments"],
+                ending_moments_left=PACING["ending_moments_left"],
+            )
+            if PACING["enabled"]
+            else None
+        )
 
     def _get_narrator_intro(self) -> str:
         return "The room feels tense as the story begins."
@@ -158,11 +262,81 @@ class OrganicMultiAgentEngine:
     # CORE GAME LOOP
     # =========================================================================
 
-    async def process_moment(self, player_input: Optional[str] = None) -> dict:
+    async def process_moment(
+        self,
+        player_input: Optional[str] = None,
+        known_version: Optional[int] = None,
+        view: View = VIEWS[DEFAULT_VIEW],
+        fields: Optional[Iterable[str]] = None,
+    ) -> dict:
+        """
+        Play one moment
+
+        Args:
+            player_input: What the player does (None: an NPC may act)
+            known_version: State version the client already has; the
+                response then carries a patch against it instead of the
+                full state
+            view: What the client may see; work only a hidden field needs
+                is skipped
+            fields: Top-level response fields wanted (None: all the view
+                shows)
+
+        Raises:
+            MomentInFlight: Another moment of this session is still playing
+        """
         if not self.state or self.state.scene_concluded:
             return {"error": "Game not active or already concluded."}
-
-        self.state.moment_count += 1
+        # checked and set before the first await: two moments never share a base
+        if self._moment_in_flight:
+            raise MomentInFlight()
+
+        current_session.set(self.session_id)
+
+        # the moment's changes only reach the state if it runs to the end
+        changes = ChangeSet(self.state)
+        changes.moment_count = self.state.moment_count + 1
+
+        # one trace per moment: stages are its children, LLM calls theirs
+        with TRACER.span(
+            "process_moment",
+            session_id=self.session_id,
+            moment=changes.moment_count,
+            initiator="player" if player_input else "npc",
+        ) as span:
+            self._moment_in_flight = True
+            start = time.monotonic()
+            try:
+                result = await self._run_moment(
+                    player_input, changes, known_version, view, fields
+                )
+                MOMENT_SECONDS.observe(time.monotonic() - start, outcome="ok")
+                degraded = result.get("degraded_stages")
+                span.set(
+                    outcome="ok", degraded=",".join(degraded) if degraded else None
+                )
+                return project(result, view, fields)
+            except (asyncio.CancelledError, Exception):
+                MOMENT_SECONDS.observe(time.monotonic() - start, outcome="rolled_back")
+                span.set(outcome="rolled_back")
+                if not changes.closed:
+                    logger.warning(
+                        f"Moment {changes.moment_count} rolled back "
+                        f"({len(changes)} staged changes dropped)"
+                    )
+                    changes.abort()
+                raise
+            finally:
+                self._moment_in_flight = False
+
+    async def _run_moment(
+        self,
+        player_input: Optional[str],
+        changes: ChangeSet,
+        known_version: Optional[int],
+        view: View,
+        fields: Optional[Iterable[str]],
+    ) -> dict:
 
         if player_input:
             initiator = "player"
@@ -171,108 +345,344 @@ class OrganicMultiAgentEngine:
             if not initiator:
                 return {"error": "No action taken"}
 
-        gm_interpretation = await self.gm_agent.interpret_moment(
-            player_input, initiator, self.state
+        # every stage gets a deadline; one that overruns degrades to its fallback
+        budget = MomentBudget(self.profile.moment_budget, MOMENT_BUDGET_RESERVES)
+
+        gm_interpretation = await budget.run(
+            "interpret_moment",
+            self.gm_agent.interpret_moment(player_input, initiator, changes),
+            lambda: self.gm_agent._fallback_interpretation(
+                player_input, initiator, changes
+            ),
         )
 
-        self.state.log_event(
+        changes.log_event(
             event_type="player_action" if player_input else "npc_action",
             actor=initiator,
             description=gm_interpretation["what_happens"],
-            location=self.state.player_location,
+            location=changes.player_location,
             participants=["player"] + gm_interpretation.get("affected_npcs", []),
         )
 
-        self.state.tension_level = max(
+        changes.tension_level = max(
             1,
-            min(
-                10, self.state.tension_level + gm_interpretation.get("tension_delta", 0)
-            ),
+            min(10, changes.tension_level + gm_interpretation.get("tension_delta", 0)),
         )
 
         affected_npcs = gm_interpretation.get("affected_npcs", [])
-        npc_responses = (
-            await asyncio.gather(
-                *[
-                    self.npc_agents[npc_id].respond_to_moment(
-                        gm_interpretation["context_for_npcs"], self.state
-                    )
-                    for npc_id in affected_npcs
-                    if npc_id in self.npc_agents
-                ]
-            )
-            if affected_npcs
-            else []
+        npc_responses = await self._npc_responses(
+            affected_npcs, gm_interpretation["context_for_npcs"], budget, changes
         )
 
-        gm_narrative = await self.gm_agent.synthesize_narrative(
-            gm_interpretation, npc_responses, self.state
-        )
+        fused_scene_status = None
+        if self.gm_mode == "fused" and self.profile.stage_enabled(
+            "check_scene_status"
+        ):
+            fused = await budget.run(
+                "synthesize_and_check_scene",
+                self.gm_agent.synthesize_and_check_scene(
+                    gm_interpretation, npc_responses, changes
+                ),
+                lambda: {
+                    "narrative": self.gm_agent._fallback_narrative(
+                        gm_interpretation, npc_responses
+                    ),
+                    "scene_status": self.gm_agent._fallback_scene_status(),
+                },
+            )
+            gm_narrative = fused["narrative"]
+            fused_scene_status = {
+                **fused["scene_status"],
+                "source": (
+                    "degraded"
+                    if "synthesize_and_check_scene" in budget.degraded
+                    else "fused"
+                ),
+            }
+        else:
+            gm_narrative = await budget.run(
+                "synthesize_narrative",
+                self.gm_agent.synthesize_narrative(
+                    gm_interpretation, npc_responses, changes
+                ),
+                lambda: self.gm_agent._fallback_narrative(
+                    gm_interpretation, npc_responses
+                ),
+            )
 
-        self.state.tension_level = gm_narrative.get(
-            "tension_level", self.state.tension_level
-        )
-        self.state.scene_energy = gm_narrative.get(
-            "scene_energy", self.state.scene_energy
+        changes.tension_level = gm_narrative.get(
+            "tension_level", changes.tension_level
         )
+        changes.scene_energy = gm_narrative.get("scene_energy", changes.scene_energy)
 
-        narrator_output = await self.narrator_agent.narrate_moment(
-            {
-                "what_happens": gm_narrative["narrative"],
-                "tension": self.state.tension_level,
-                "energy": self.state.scene_energy,
-            },
-            npc_responses,
-            self.state,
+        gm_facts = {
+            "what_happens": gm_narrative["narrative"],
+            "tension": changes.tension_level,
+            "energy": changes.scene_energy,
+        }
+        narration = budget.run(
+            "narrate_moment",
+            self.narrator_agent.narrate_moment(
+                gm_facts,
+                npc_responses,
+                changes,
+                changes,
+                debug=view.shows("debug", fields),
+            ),
+            lambda: self.narrator_agent._fallback_narration(gm_facts),
         )
 
-        narrator_aside = await self.narrator_agent.narrator_aside(self.state)
-
-        scene_status = await self.gm_agent.check_scene_status(self.state)
+        # the aside only reads tension and recent events, both final by now
+        if not self.profile.stage_enabled("narrator_aside"):
+            narrator_output = await narration
+            narrator_aside = None
+        else:
+            aside = budget.run(
+                "narrator_aside",
+                self.narrator_agent.narrator_aside(changes, changes),
+                lambda: None,
+            )
+            if NARRATOR_ASIDE["concurrent"]:
+                narrator_output, narrator_aside = await asyncio.gather(narration, aside)
+            else:
+                narrator_output = await narration
+                narrator_aside = await aside
+
+        if fused_scene_status:
+            scene_status = fused_scene_status
+            if self.pacing and scene_status["source"] == "fused":
+                # weighed against the local estimate like a split LLM check
+                self.pacing.record_llm_check(
+                    self.pacing.estimate(changes), scene_status
+                )
+        else:
+            scene_status = await budget.run(
+                "check_scene_status",
+                self._check_scene_status(changes),
+                lambda: {
+                    **self.gm_agent._fallback_scene_status(),
+                    "source": "degraded",
+                },
+            )
+        if self.pacing:
+            # the moment joins the pacing history only if it is committed
+            changes.defer(
+                self.pacing.record,
+                changes.tension_level,
+                changes.scene_energy,
+                scene_status.get("source") in ("llm", "fused"),
+            )
 
         if scene_status.get("approaching_ending"):
-            self._conclude_scene(scene_status.get("ending_type"))
+            self._conclude_scene(changes, scene_status.get("ending_type"))
 
         external_event = None
-        if scene_status.get("energy_assessment") == "stalled" and scene_status.get(
-            "needs_stimulus"
-        ):
-            external_event = await self.gm_agent.generate_stimulus(self.state)
-            self.state.log_event(
-                event_type="external",
-                actor="environment",
-                description=external_event,
-                location=self.state.player_location,
-            )
-
         if (
-            self.state.moment_count >= self.state.max_moments
-            and not self.state.scene_concluded
+            self.profile.stage_enabled("generate_stimulus")
+            and scene_status.get("energy_assessment") == "stalled"
+            and scene_status.get("needs_stimulus")
         ):
-            self._force_conclusion()
+            external_event = (
+                self.stimulus_pool.take(changes) if self.stimulus_pool else None
+            ) or await budget.run(
+                "generate_stimulus",
+                self.gm_agent.generate_stimulus(changes),
+                lambda: None,
+            )
+            if external_event:
+                changes.log_event(
+                    event_type="external",
+                    actor="environment",
+                    description=external_event,
+                    location=changes.player_location,
+                )
+
+        if changes.moment_count >= changes.max_moments and not changes.scene_concluded:
+            self._force_conclusion(changes)
+
+        # the whole moment lands in the state at once, after its last await;
+        # a cancel or failure before this line leaves the state untouched
+        changes.commit()
+        self.commits += 1
+        self._bind_agents()
+        self._checkpoint()
+        self.versions.bump()
+
+        # generate the next stimulus off the hot path, while the player reads
+        if self.stimulus_pool and not self.state.scene_concluded:
+            self.stimulus_pool.schedule_refill(
+                self.state, scene_status.get("energy_assessment")
+            )
 
-        return {
+        result = {
             "narration": narrator_output["narration"],
             "narrator_reliability": self.narrator_agent.narrator_state.reliability,
             "narrator_aside": narrator_aside,
             "npc_responses": npc_responses,
             "external_event": external_event,
-            "state": self.state.to_dict(),
             "scene_status": scene_status,
-            "debug": {
+            "degraded_stages": budget.degraded,
+        }
+        if view.shows("state", fields):
+            result.update(self._encode_state(view, known_version))
+        if view.shows("debug", fields):
+            result["debug"] = {
                 "gm_objective_truth": gm_narrative["narrative"],
                 "narrator_noticed": narrator_output.get("what_you_noticed", []),
                 "narrator_missed": narrator_output.get("what_you_missed", []),
                 "narrator_interpretation": narrator_output.get(
                     "your_interpretation", ""
                 ),
-            },
+            }
+        return result
+
+    # =========================================================================
+    # CHECKPOINTS, REWIND AND BRANCHES
+    # =========================================================================
+
+    async def rewind(
+        self,
+        moment: int,
+        known_version: Optional[int] = None,
+        view: View = VIEWS[DEFAULT_VIEW],
+    ) -> dict:
+        """
+        Go back to the end of `moment`, dropping every later moment
+
+        Raises:
+            MomentInFlight: A moment of this session is still playing
+        """
+        if moment not in self.checkpoints:
+            return {"error": f"No checkpoint for moment {moment}"}
+        if self._moment_in_flight:
+            raise MomentInFlight()
+
+        # pooled stimuli were written for the moments being dropped; no
+        # moment may start on the old state meanwhile
+        self._moment_in_flight = True
+        try:
+            if self.stimulus_pool:
+                await self.stimulus_pool.clear()
+        finally:
+            self._moment_in_flight = False
+
+        self.state, self.narrator_agent.narrator_state = self._restore(moment)
+        self._restore_agents(moment, self)
+        self.checkpoints = {
+            m: checkpoint
+            for m, checkpoint in self.checkpoints.items()
+            if m <= moment
         }
+        self._bind_agents()
+        self.versions.bump()
+        logger.info(f"Rewound session {self.session_id} to moment {moment}")
+
+        return {"moment": moment, **self._encode_state(view, known_version)}
+
+    def branch(self, moment: int, session_id: str) -> "OrganicMultiAgentEngine":
+        """
+        A new session that continues from the end of `moment`
+
+        It shares every NPC and event up to that point with this session
+        and only pays for what it changes afterwards.
+        """
+        if moment not in self.checkpoints:
+            raise KeyError(f"No checkpoint for moment {moment}")
+
+        engine = OrganicMultiAgentEngine(
+            api_keys=self.api_keys, profile=self.profile, session_id=session_id
+        )
+        engine.state, narrator_state = self._restore(moment)
+        engine._initialize_agents(narrator_state)
+        engine._restore_agents(moment, self)
+        engine.checkpoints = {
+            m: checkpoint
+            for m, checkpoint in self.checkpoints.items()
+            if m <= moment
+        }
+        engine.versions.bump()
+        logger.info(
+            f"Branched session {session_id} from {self.session_id} at moment {moment}"
+        )
+        return engine
+
+    def _checkpoint(self):
+        # narrator knowledge only ever grows, its length marks the snapshot
+        narrator_state = self.narrator_agent.narrator_state
+        self.checkpoints[self.state.moment_count] = (
+            self.state.fork(),
+            replace(narrator_state),
+            len(narrator_state.knowledge),
+            self.narrator_agent.aside_checkpoint(),
+            self.pacing.checkpoint() if self.pacing else None,
+        )
+
+    def _restore(self, moment: int) -> Tuple[GameState, NarratorState]:
+        # fork again so the checkpoint itself is never written to
+        state, narrator_state, known, _, _ = self.checkpoints[moment]
+        return state.fork(), replace(
+            narrator_state, knowledge=narrator_state.knowledge[:known]
+        )
+
+    def _restore_agents(self, moment: int, source: "OrganicMultiAgentEngine"):
+        """Aside cooldown/budget and pacing history as of `source`'s `moment`"""
+        _, _, _, asides, pacing = source.checkpoints[moment]
+        self.narrator_agent.restore_asides(asides)
+        if self.pacing and pacing is not None:
+            self.pacing.restore(pacing, source.pacing)
+
+    def _bind_agents(self):
+        """Point each NPC agent at its NPC in the current state (writes copy them)"""
+        for npc_id, agent in self.npc_agents.items():
+            agent.npc_state = self.state.npcs[npc_id]
 
     # =========================================================================
     # HELPERS
     # =========================================================================
 
+    async def _npc_responses(
+        self,
+        affected_npcs: List[str],
+        context: str,
+        budget: MomentBudget,
+        changes: ChangeSet,
+    ) -> List[dict]:
+        """Per-NPC fan-out, or one ensemble call when the cast is small"""
+        npc_ids = [npc_id for npc_id in affected_npcs if npc_id in self.npc_agents]
+        if not npc_ids:
+            return []
+
+        if (
+            NPC_ENSEMBLE["enabled"]
+            and NPC_ENSEMBLE["min_cast"] <= len(npc_ids) <= NPC_ENSEMBLE["max_cast"]
+        ):
+            return await budget.run(
+                "ensemble_respond",
+                self.npc_ensemble_agent.respond_to_moment(
+                    context, npc_ids, changes, changes
+                ),
+                lambda: [
+                    self.npc_agents[npc_id]._fallback_response() for npc_id in npc_ids
+                ],
+            )
+
+        # a slow NPC only degrades its own response
+        return list(
+            await asyncio.gather(
+                *[
+                    budget.run(
+                        "respond_to_moment",
+                        self.npc_agents[npc_id].respond_to_moment(
+                            context, changes, changes
+                        ),
+                        self.npc_agents[npc_id]._fallback_response,
+                        label=f"respond_to_moment:{npc_id}",
+                    )
+                    for npc_id in npc_ids
+                ]
+            )
+        )
+
     async def _find_urgent_npc(self) -> Optional[str]:
         urgent = [
             npc_id for npc_id, npc in self.state.npcs.items() if npc.urgency_level >= 7
@@ -291,15 +701,52 @@ class OrganicMultiAgentEngine:
 
         return None
 
-    def _conclude_scene(self, ending_type: Optional[str]):
-        self.state.scene_concluded = True
-        self.state.conclusion_type = ending_type or "resolution"
-        self.state.conclusion_description = "The scene concludes."
+    async def _check_scene_status(self, game_state: GameState) -> dict:
+        """Local pacing estimate first, the GM's LLM check only when needed"""
+        if not self.profile.stage_enabled("check_scene_status"):
+            # profile turned the LLM check off, local estimate or nothing
+            if self.pacing:
+                return self.pacing.estimate(game_state)
+            return {**self.gm_agent._fallback_scene_status(), "source": "skipped"}
+
+        if not self.pacing:
+            return await self.gm_agent.check_scene_status(game_state)
+
+        estimate = self.pacing.estimate(game_state)
+        if not self.pacing.needs_llm_check(estimate):
+            return estimate
+
+        scene_status = await self.gm_agent.check_scene_status(game_state)
+        self.pacing.record_llm_check(estimate, scene_status)
+        scene_status["source"] = "llm"
+        return scene_status
+
+    @staticmethod
+    def _conclude_scene(changes: ChangeSet, ending_type: Optional[str]):
+        changes.scene_concluded = True
+        changes.conclusion_type = ending_type or "resolution"
+        changes.conclusion_description = (
+            "Time runs out." if ending_type == "time_limit" else "The scene concludes."
+        )
 
-    def _force_conclusion(self):
-        self.state.scene_concluded = True
-        self.state.conclusion_type = "time_limit"
-        self.state.conclusion_description = "Time runs out."
+    @staticmethod
+    def _force_conclusion(changes: ChangeSet):
+        changes.scene_concluded = True
+        changes.conclusion_type = "time_limit"
+        changes.conclusion_description = "Time runs out."
 
     def get_state(self) -> dict:
         return self.state.to_dict() if self.state else {"error": "No active game"}
+
+    def state_snapshot(self, view: View = VIEWS[DEFAULT_VIEW]) -> dict:
+        """Full state at the current version, for clients that lost track"""
+        if not self.state:
+            return {"error": "No active game"}
+        return self._encode_state(view)
+
+    def _encode_state(self, view: View, known_version: Optional[int] = None) -> dict:
+        # only the serialization the view shows is built
+        state = (
+            self.state.to_dict() if view.private_state else self.state.to_public_dict()
+        )
+        return self.versions.encode(view.state_kind, state, known_version)
@@ -0,0 +1,122 @@
+# backend/idempotency.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AlreadyApplied(Exception):
+    """A retry of work that took effect but then failed, it is not run again"""
+
+
+class _Entry:
+    def __init__(self, task: asyncio.Task, applied: Optional[Callable[[], bool]]):
+        self.task = task
+        self.applied = applied
+        self.created = time.monotonic()
+        self.waiters = 0
+
+
+class IdempotencyCache:
+    """
+    Bounded cache of in-flight and finished results by idempotency key
+
+    The first request with a key starts the work; a retry with the same key
+    joins it while it runs, or gets the stored result once it is done, so
+    a double submit never runs the pipeline (and advances the game) twice.
+
+    Work that fails or is cancelled is forgotten so a retry runs it again,
+    unless its `applied()` check says it took effect before failing: then
+    the key stays taken and a retry gets AlreadyApplied. When every request
+    waiting on a piece of work has gone away, the work is cancelled.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.stats = {"started": 0, "joined": 0, "replayed": 0}
+
+    async def run(
+        self,
+        key: Hashable,
+        work: Callable[[], Awaitable],
+        applied: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Result of `work()` for this key, running it only once
+
+        Args:
+            key: Idempotency key
+            work: Starts the work (only called for a new key)
+            applied: Whether the work already took effect, asked if it fails
+
+        Returns:
+            (result, replayed): replayed is True when another request with
+                the same key did the work
+
+        Raises:
+            AlreadyApplied: The work took effect, then failed
+        """
+        self._evict_expired()
+
+        entry = self._entries.get(key)
+        if entry is not None and _failed(entry.task):
+            if entry.applied and entry.applied():
+                raise AlreadyApplied()
+            # failed without effect, its done callback just hasn't run yet
+            del self._entries[key]
+            entry = None
+
+        replayed = entry is not None
+        if entry is None:
+            entry = _Entry(asyncio.ensure_future(work()), applied)
+            entry.task.add_done_callback(lambda task: self._forget_failed(key, task))
+            self._entries[key] = entry
+            self.stats["started"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        elif entry.task.done():
+            self.stats["replayed"] += 1
+        else:
+            self.stats["joined"] += 1
+            logger.info("Duplicate request joined the in-flight one")
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task), replayed
+        except asyncio.CancelledError:
+            if entry.waiters == 1 and not entry.task.done():
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "entries": len(self._entries)}
+
+    def _forget_failed(self, key: Hashable, task: asyncio.Task):
+        entry = self._entries.get(key)
+        if entry is None or entry.task is not task or not _failed(task):
+            return
+        if entry.applied and entry.applied():
+            logger.warning("Work failed after taking effect, a retry won't rerun it")
+            return
+        del self._entries[key]
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.created > cutoff or not entry.task.done():
+                break
+            self._entries.popitem(last=False)
+
+
+def _failed(task: asyncio.Task) -> bool:
+    return task.done() and (task.cancelled() or task.exception() is not None)
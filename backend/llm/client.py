@@ -0,0 +1,438 @@
+# backend/llm/client.py
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from anthropic import (
+    APIConnectionError,
+    APIStatusError,
+    AuthenticationError,
+    InternalServerError,
+    NOT_GIVEN,
+    OverloadedError,
+    PermissionDeniedError,
+    RateLimitError,
+)
+
+from backend.models.session_profile import SessionProfile
+from backend.llm.router import ModelRouter
+from backend.llm.hedging import HedgePolicy
+from backend.llm.concurrency import AdaptiveLimiter
+from backend.llm.key_pool import KeyPool
+from backend.llm.scheduling import current_priority, current_session
+from backend.metrics import LLM_CALL_SECONDS, LLM_REQUEST_ERRORS, record_usage
+from backend.tracing import TRACER, current_span
+
+from config import (
+    MODEL_TIERS,
+    MODEL_ROUTES,
+    HEDGING,
+    CONCURRENCY,
+    KEY_POOL,
+    SCHEDULING,
+)
+
+logger = logging.getLogger(__name__)
+
+# monotonic deadline of the moment stage making the call (see MomentBudget)
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+
+@dataclass
+class LLMResult:
+    """One finished agent call"""
+
+    text: str
+    model: str
+    usage: Any  # anthropic Usage of the accepted attempt
+    latency: float  # seconds, all cascade attempts included
+    escalated: bool = False
+
+
+def schema_errors(data: Any, schema: dict, path: str = "$") -> List[str]:
+    """
+    Minimal JSON-schema check (type, nullable type lists, enum, required, items)
+
+    Structured outputs should already guarantee this, but a cheap model can
+    still return an empty or truncated answer and the cascade needs to know
+    """
+    errors = []
+    expected = schema.get("type")
+    if isinstance(expected, list):
+        # nullable field, e.g. ["string", "null"]
+        if data is None and "null" in expected:
+            return []
+        expected = next((t for t in expected if t != "null"), None)
+    types = {
+        "object": dict,
+        "array": list,
+        "string": str,
+        "integer": int,
+        "boolean": bool,
+    }
+
+    if expected in types and not isinstance(data, types[expected]):
+        return [f"{path}: expected {expected}"]
+    if expected == "integer" and isinstance(data, bool):
+        return [f"{path}: expected integer"]
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{path}: {data!r} not in enum")
+
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}.{key}: missing")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in data and data[key] is not None:
+                errors.extend(schema_errors(data[key], sub_schema, f"{path}.{key}"))
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(data):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def keys_from_env() -> List[str]:
+    """ANTHROPIC_API_KEYS (comma separated) plus ANTHROPIC_API_KEY"""
+    keys = [key.strip() for key in os.getenv("ANTHROPIC_API_KEYS", "").split(",")]
+    keys.append(os.getenv("ANTHROPIC_API_KEY", ""))
+    return [key for key in keys if key]
+
+
+def retry_after(error: APIStatusError) -> Optional[float]:
+    """Seconds the provider asked us to wait, from retry-after(-ms) headers"""
+    headers = error.response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def trace_usage(usage: Any):
+    """Add one API response's token usage to the current LLM call span"""
+    span = current_span.get()
+    if span is None or usage is None:
+        return
+    for tag, field in (
+        ("prompt_tokens", "input_tokens"),
+        ("output_tokens", "output_tokens"),
+        ("cache_read_tokens", "cache_read_input_tokens"),
+        ("cache_write_tokens", "cache_creation_input_tokens"),
+    ):
+        span.add(tag, getattr(usage, field, None) or 0)
+
+
+class LLMClient:
+    """
+    Shared call layer for every agent
+
+    Agents build their prompts and schemas; this class decides which model
+    answers (session profile + model router), sends the request, validates
+    the structured output and escalates along a cascade when needed.
+
+    Every request to a model holds a slot of that model's AdaptiveLimiter
+    and goes out on a key chosen by the KeyPool; 429/529 answers are retried
+    here (not by the SDK) with jittered backoff so both of them see it.
+
+    Requests are tagged with a priority class (SCHEDULING["call_priorities"],
+    or current_priority for background work) and the calling session
+    (current_session), which decide their turn when a model's slots are full.
+
+    Each call is a span of the current trace, tagged with the answering
+    model, its token usage and the retries it took.
+    """
+
+    def __init__(
+        self,
+        router: ModelRouter,
+        api_keys: Optional[List[str]] = None,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        self.keys = KeyPool(
+            api_keys or keys_from_env(),
+            max_rate_limits=KEY_POOL["max_rate_limits"],
+            cooldown=KEY_POOL["cooldown"],
+            auth_cooldown=KEY_POOL["auth_cooldown"],
+        )
+        self.router = router
+        self.hedging = hedging
+        self.limiters: Dict[str, AdaptiveLimiter] = {}
+        # requests aborted mid-flight (client gone, deadline, lost hedge)
+        self.cancellations = {"requests": 0, "output_tokens_saved": 0.0}
+
+    async def call(
+        self,
+        agent: str,
+        call_type: str,
+        profile: SessionProfile,
+        system: str,
+        prompt: str,
+        response_schema: dict,
+        validator: Optional[Callable[[dict], bool]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> LLMResult:
+        """
+        Run one agent call, escalating along the route's cascade if needed
+
+        Args:
+            agent: "gm", "npc" or "narrator" (profile lookup)
+            call_type: The agent method making the call (routing + stats)
+            profile: Session profile of the calling agent
+            system: System prompt
+            prompt: User message
+            response_schema: JSON schema for the structured output
+            validator: Optional check on the parsed answer; False flags it as
+                low-confidence and escalates to the next model
+            max_tokens: Override the profile's output cap for this call
+
+        Returns:
+            LLMResult: The last attempt's answer (accepted, or the most capable
+                model's answer when every attempt was rejected)
+        """
+        # a profile that names a model for this exact call type overrides routing
+        explicit = profile.explicit_model(call_type)
+        if explicit:
+            models = [explicit]
+        else:
+            models = self.router.models_for(call_type, profile.model_for(agent, call_type))
+
+        timeout = profile.timeout_for(agent, call_type)
+        max_tokens = max_tokens or profile.max_tokens_for(agent, call_type)
+        tag = (
+            current_priority.get()
+            or SCHEDULING["call_priorities"].get(call_type, "interactive"),
+            current_session.get(),
+            profile.fair_share,
+        )
+
+        with TRACER.span(
+            f"llm:{call_type}",
+            agent=agent,
+            call_type=call_type,
+            session_id=tag[1],
+            priority=tag[0],
+        ) as span:
+            start = time.perf_counter()
+            tried = []
+            for i, model in enumerate(models):
+                attempt_timeout = self._attempt_timeout(timeout)
+                tried.append(model)
+                attempt_start = time.perf_counter()
+
+                request = dict(
+                    model=model,
+                    max_tokens=max_tokens,
+                    timeout=(
+                        attempt_timeout if attempt_timeout is not None else NOT_GIVEN
+                    ),
+                    system=system,
+                    messages=[{"role": "user", "content": prompt}],
+                    output_config={
+                        "format": {"type": "json_schema", "schema": response_schema}
+                    },
+                )
+                if self.hedging:
+                    response = await self.hedging.run(
+                        call_type, model, lambda: self._send(call_type, request, tag)
+                    )
+                else:
+                    response = await self._send(call_type, request, tag)
+                text = response.content[0].text
+
+                accepted = self._acceptable(text, response_schema, validator)
+                self.router.record(
+                    call_type,
+                    model,
+                    time.perf_counter() - attempt_start,
+                    response.usage.input_tokens,
+                    response.usage.output_tokens,
+                    accepted,
+                )
+
+                if accepted or i == len(models) - 1:
+                    escalated = len(tried) > 1
+                    latency = time.perf_counter() - start
+                    self.router.record_call(call_type, tried, escalated)
+                    span.set(
+                        model=model, models_tried=",".join(tried), escalated=escalated
+                    )
+                    LLM_CALL_SECONDS.observe(
+                        latency, agent=agent, call_type=call_type, model=model
+                    )
+                    return LLMResult(
+                        text=text,
+                        model=model,
+                        usage=response.usage,
+                        latency=latency,
+                        escalated=escalated,
+                    )
+
+                logger.info(f"{call_type}: {model} answer rejected, escalating")
+
+    async def _send(self, call_type: str, request: dict, tag: tuple):
+        """
+        One request under the model's concurrency limit, retried on overload
+
+        `tag` is (priority class, session id, fair-share weight)
+        """
+        limiter = self.limiter_for(request["model"])
+        max_retries = CONCURRENCY["max_retries"]
+
+        for attempt in range(max_retries + 1):
+            wait = None
+            async with limiter.slot(*tag):
+                key = self.keys.choose()
+                key.in_flight += 1
+                sent_at = time.monotonic()
+                try:
+                    raw = await key.client.messages.with_raw_response.create(**request)
+                    response = await raw.parse()
+                except RateLimitError as e:
+                    LLM_REQUEST_ERRORS.inc(model=request["model"], error="rate_limit")
+                    # a 429 is about this key; with other keys left, only it waits
+                    wait = retry_after(e)
+                    self.keys.on_rate_limited(key, wait)
+                    if len(self.keys.keys) > 1:
+                        wait = None
+                    limiter.on_overload(sent_at, wait)
+                    if attempt == max_retries:
+                        raise
+                except OverloadedError as e:
+                    LLM_REQUEST_ERRORS.inc(model=request["model"], error="overloaded")
+                    wait = retry_after(e)
+                    limiter.on_overload(sent_at, wait)
+                    if attempt == max_retries:
+                        raise
+                except (AuthenticationError, PermissionDeniedError):
+                    LLM_REQUEST_ERRORS.inc(model=request["model"], error="auth")
+                    self.keys.on_auth_error(key)
+                    if attempt == max_retries or len(self.keys.keys) == 1:
+                        raise
+                    continue  # straight to the next key, no backoff
+                except (APIConnectionError, InternalServerError) as e:
+                    LLM_REQUEST_ERRORS.inc(
+                        model=request["model"], error=e.__class__.__name__
+                    )
+                    if attempt == max_retries:
+                        raise
+                except asyncio.CancelledError:
+                    # the answer is not generated (or paid for) past this point
+                    self.cancellations["requests"] += 1
+                    self.cancellations["output_tokens_saved"] += (
+                        self.router.avg_output_tokens(call_type, request["model"])
+                    )
+                    raise
+                else:
+                    self.keys.on_success(key, raw.headers, response.usage)
+                    record_usage(request["model"], response.usage)
+                    trace_usage(response.usage)
+                    limiter.on_success(call_type, time.monotonic() - sent_at, sent_at)
+                    return response
+                finally:
+                    key.in_flight -= 1
+
+            delay = limiter.backoff(
+                attempt, wait, CONCURRENCY["backoff_base"], CONCURRENCY["backoff_max"]
+            )
+            logger.info(f"{call_type}: retrying {request['model']} in {delay:.1f}s")
+            span = current_span.get()
+            if span:
+                span.add("retries")
+            await asyncio.sleep(delay)
+
+    def limiter_for(self, model: str) -> AdaptiveLimiter:
+        limiter = self.limiters.get(model)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                model,
+                initial=CONCURRENCY["initial"],
+                min_limit=CONCURRENCY["min"],
+                max_limit=CONCURRENCY["max"],
+                decrease_factor=CONCURRENCY["decrease_factor"],
+                latency_tolerance=CONCURRENCY["latency_tolerance"],
+                shares=SCHEDULING["shares"],
+            )
+            self.limiters[model] = limiter
+        return limiter
+
+    def _attempt_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Profile timeout, cut down to what is left of the stage's deadline"""
+        deadline = current_deadline.get()
+        if deadline is None:
+            return timeout
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # no point starting an attempt (or escalating) past the deadline
+            raise asyncio.TimeoutError()
+
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def _acceptable(
+        self,
+        text: str,
+        response_schema: dict,
+        validator: Optional[Callable[[dict], bool]],
+    ) -> bool:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return False
+
+        if schema_errors(data, response_schema):
+            return False
+
+        return validator(data) if validator else True
+
+
+_clients: Dict[tuple, LLMClient] = {}
+
+
+def get_client(api_keys: Optional[List[str]] = None) -> LLMClient:
+    """
+    Call layer for a set of API keys, shared by every session using them
+
+    Created on first use; without keys, the keys from the environment
+    """
+    keys = tuple(api_keys or keys_from_env())
+
+    if keys not in _clients:
+        hedging = (
+            HedgePolicy(
+                call_types=HEDGING["call_types"],
+                percentile=HEDGING["percentile"],
+                min_samples=HEDGING["min_samples"],
+                budget=HEDGING["budget"],
+            )
+            if HEDGING["enabled"]
+            else None
+        )
+        _clients[keys] = LLMClient(
+            ModelRouter(MODEL_TIERS, MODEL_ROUTES), api_keys=list(keys), hedging=hedging
+        )
+
+    return _clients[keys]
+
+
+def get_default_client() -> LLMClient:
+    """Process-wide call layer for the environment's API keys"""
+    return get_client()
+
+
+def peek_default_client() -> Optional[LLMClient]:
+    """
+    The process-wide call layer if anything has used it yet, else None
+
+    For stats: never builds one, so it works without any API key set
+    """
+    return _clients.get(tuple(keys_from_env()))
@@ -0,0 +1,186 @@
+# backend/llm/concurrency.py
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from backend.llm.scheduling import FairQueue
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on in-flight requests to one model
+
+    The limit grows by one after a full limit's worth of healthy answers
+    while the limiter was actually saturated (additive increase), and is cut
+    by `decrease_factor` on a 429/529 or when a call takes more than
+    `latency_tolerance` times its usual latency (multiplicative decrease).
+    Like TCP, only requests sent after the last decrease can trigger the next
+    one, so a burst of errors from the same window counts as one signal.
+
+    Usual latency is tracked per call type, since a narration and a scene
+    check on the same model take very different times.
+
+    A Retry-After from the provider blocks new requests to the model until
+    it has passed.
+
+    Requests that find no free slot wait in a FairQueue (priority classes,
+    fair share per session). `shares` caps the part of the limit a priority
+    class may hold, so background work always leaves room for players.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.5,
+        shares: Optional[Dict[str, float]] = None,
+    ):
+        self.model = model
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.shares = shares or {}
+
+        self.in_flight = 0
+        self._queue = FairQueue()
+        self._healthy_in_window = 0
+        self._saturated = False
+        self._last_decrease = 0.0
+        self._blocked_until = 0.0
+        self._baseline: Dict[str, float] = {}  # call type -> EWMA latency
+
+        self.stats = {
+            "requests": 0,
+            "queued": 0,
+            "overloads": 0,
+            "slow_answers": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: str = "interactive",
+        session_id: Optional[str] = None,
+        weight: float = 1.0,
+    ):
+        """Hold one in-flight slot for the duration of a request"""
+        await self.acquire(priority, session_id, weight)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(
+        self,
+        priority: str = "interactive",
+        session_id: Optional[str] = None,
+        weight: float = 1.0,
+    ):
+        self.stats["requests"] += 1
+
+        blocked = self._blocked_until - time.monotonic()
+        if blocked > 0:
+            await asyncio.sleep(blocked)
+
+        if self._has_slot(priority) and not self._queue.waiting(priority):
+            self.in_flight += 1
+            self._saturated = self._saturated or self.in_flight >= self.limit
+            return
+
+        self.stats["queued"] += 1
+        self._saturated = True
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.push(waiter, priority, session_id, weight)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # slot was handed over just as we were cancelled, pass it on
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self, call_type: str, latency: float, sent_at: float):
+        """Feed a healthy (2xx) answer's latency back into the limit"""
+        baseline = self._baseline.get(call_type, latency)
+        # slow answers move the baseline too, so a lasting shift is absorbed
+        self._baseline[call_type] = 0.9 * baseline + 0.1 * latency
+
+        if latency > self.latency_tolerance * baseline:
+            self.stats["slow_answers"] += 1
+            self._decrease(
+                sent_at, f"{call_type} took {latency:.1f}s (usual {baseline:.1f}s)"
+            )
+            return
+
+        self._healthy_in_window += 1
+        if self._healthy_in_window >= self.limit:
+            self._healthy_in_window = 0
+            if self._saturated and self.limit < self.max_limit:
+                self.limit += 1
+                self.stats["increases"] += 1
+                self._wake()
+            self._saturated = False
+
+    def on_overload(self, sent_at: float, retry_after: Optional[float] = None):
+        """The provider answered 429 or 529 to a request sent at `sent_at`"""
+        self.stats["overloads"] += 1
+        if retry_after:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after
+            )
+        self._decrease(sent_at, "provider overloaded")
+
+    def backoff(self, attempt: int, retry_after: Optional[float], base: float, cap: float) -> float:
+        """Jittered exponential backoff, never shorter than the Retry-After"""
+        delay = min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        return max(delay, retry_after or 0.0)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self._queue.waiting(),
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+        }
+
+    def _decrease(self, sent_at: float, reason: str):
+        self._healthy_in_window = 0
+        if sent_at < self._last_decrease:
+            return
+
+        self._last_decrease = time.monotonic()
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit < self.limit:
+            logger.warning(f"{self.model}: concurrency {self.limit} -> {new_limit} ({reason})")
+            self.limit = new_limit
+            self.stats["decreases"] += 1
+
+    def _has_slot(self, priority: str) -> bool:
+        share = self.shares.get(priority, 1.0)
+        return self.in_flight < max(1, int(self.limit * share))
+
+    def _wake(self):
+        while True:
+            waiter = self._queue.pop(self._has_slot)
+            if waiter is None:
+                return
+            self.in_flight += 1
+            waiter.set_result(None)
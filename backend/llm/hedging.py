@@ -0,0 +1,177 @@
+# backend/llm/hedging.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Request hedging for critical-path calls
+
+    When a call has not answered by the `percentile` of its recent latency
+    (per call type and model), a duplicate request is sent; the first answer
+    wins and the other request is cancelled.
+
+    Hedges are paid for with a budget: every call earns `budget` hedge
+    credits (0.1 = at most one hedge per ten calls in the long run), capped
+    at `burst`, so a provider-wide slowdown cannot double the traffic.
+
+    Time saved by a winning hedge cannot be measured directly (the primary
+    is cancelled), so it is estimated as the mean recent latency above the
+    winning time, minus that time.
+    """
+
+    def __init__(
+        self,
+        call_types: List[str],
+        percentile: float = 0.9,
+        min_samples: int = 20,
+        budget: float = 0.1,
+        burst: float = 3.0,
+        window: int = 200,
+    ):
+        self.call_types = set(call_types)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._credits = burst
+        self.stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "denied_by_budget": 0,
+            "time_saved_estimate": 0.0,
+        }
+
+    def delay_for(self, call_type: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, None if this call is not hedged"""
+        if call_type not in self.call_types:
+            return None
+
+        recent = self._latencies.get((call_type, model))
+        if not recent or len(recent) < self.min_samples:
+            return None
+
+        ordered = sorted(recent)
+        return ordered[int(self.percentile * (len(ordered) - 1))]
+
+    def record(self, call_type: str, model: str, latency: float):
+        recent = self._latencies.setdefault(
+            (call_type, model), deque(maxlen=self.window)
+        )
+        recent.append(latency)
+
+    async def run(
+        self,
+        call_type: str,
+        model: str,
+        send: Callable[[], Awaitable],
+    ):
+        """
+        Await `send()`, hedging it with a second `send()` if it runs long
+
+        Args:
+            call_type: The agent method making the call
+            model: Model the request goes to
+            send: Starts one request (called once, or twice when hedged)
+
+        Returns:
+            The first successful response
+        """
+        delay = self.delay_for(call_type, model)
+        if delay is None:
+            return await self._timed(call_type, model, send)
+
+        self.stats["calls"] += 1
+        self._credits = min(self.burst, self._credits + self.budget)
+
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(send())
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                response = primary.result()
+                self.record(call_type, model, time.perf_counter() - start)
+                return response
+
+            if self._credits < 1:
+                self.stats["denied_by_budget"] += 1
+                response = await primary
+                self.record(call_type, model, time.perf_counter() - start)
+                return response
+
+            self._credits -= 1
+            self.stats["hedged"] += 1
+            logger.info(f"Hedging {call_type} on {model} after {delay:.2f}s")
+            hedge = asyncio.ensure_future(send())
+
+            winner = await self._first_success(primary, hedge)
+            response = winner.result()
+            elapsed = time.perf_counter() - start
+
+            if winner is hedge:
+                self.stats["hedge_wins"] += 1
+                self.stats["time_saved_estimate"] += self._expected_excess(
+                    call_type, model, elapsed
+                )
+            self.record(call_type, model, elapsed)
+            return response
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict:
+        calls = max(1, self.stats["calls"])
+        return {
+            **self.stats,
+            "time_saved_estimate": round(self.stats["time_saved_estimate"], 3),
+            "hedge_rate": round(self.stats["hedged"] / calls, 3),
+            "delays": {
+                f"{call_type}/{model}": round(delay, 3)
+                for call_type, model in self._latencies
+                if (delay := self.delay_for(call_type, model)) is not None
+            },
+        }
+
+    async def _timed(self, call_type: str, model: str, send: Callable[[], Awaitable]):
+        start = time.perf_counter()
+        response = await send()
+        if call_type in self.call_types:
+            self.record(call_type, model, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    async def _first_success(*tasks: asyncio.Future) -> asyncio.Future:
+        """First task to finish without an error (the first failed one if all fail)"""
+        pending = set(tasks)
+        first_failed = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task
+                first_failed = first_failed or task
+        return first_failed
+
+    def _expected_excess(self, call_type: str, model: str, elapsed: float) -> float:
+        slower = [
+            latency
+            for latency in self._latencies.get((call_type, model), ())
+            if latency > elapsed
+        ]
+        if not slower:
+            return 0.0
+        return sum(slower) / len(slower) - elapsed
@@ -0,0 +1,146 @@
+# backend/llm/key_pool.py
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+from anthropic import AsyncAnthropic
+
+logger = logging.getLogger(__name__)
+
+
+class APIKey:
+    """One API key: its client, last known rate-limit headroom, health and usage"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.client = AsyncAnthropic(api_key=key, max_retries=0)
+        # "sk-ant-...abcd", never report the whole key
+        self.label = f"...{key[-4:]}"
+
+        self.in_flight = 0
+        self.last_used = 0.0
+        # fractions of the rate limits left, from the last response headers
+        self.requests_left: Optional[float] = None
+        self.tokens_left: Optional[float] = None
+        self.limits_reset_at = 0.0
+
+        self.consecutive_rate_limits = 0
+        self.ejected_until = 0.0
+        self.ejected_reason: Optional[str] = None
+
+        self.usage = {
+            "requests": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "rate_limited": 0,
+            "auth_errors": 0,
+            "ejections": 0,
+        }
+
+    def headroom(self, now: float) -> float:
+        """Share of the key's rate limits still available (1.0 when unknown)"""
+        if now >= self.limits_reset_at:
+            return 1.0
+        known = [left for left in (self.requests_left, self.tokens_left) if left is not None]
+        return min(known) if known else 1.0
+
+
+class KeyPool:
+    """
+    Spreads calls over several API keys with separate rate limits
+
+    Each call goes to the healthy key with the most rate-limit headroom
+    (from the anthropic-ratelimit-* response headers), fewest in-flight
+    requests and then least recent use breaking ties. A key is taken out of
+    rotation after `max_rate_limits` 429s in a row (for `cooldown` seconds,
+    or the Retry-After if longer) or on an authentication error (for
+    `auth_cooldown` seconds), and put back when that has passed.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        max_rate_limits: int = 3,
+        cooldown: float = 60.0,
+        auth_cooldown: float = 600.0,
+    ):
+        if not keys:
+            raise RuntimeError("ANTHROPIC_API_KEY is not set in the environment")
+
+        self.keys = [APIKey(key) for key in dict.fromkeys(keys)]
+        self.max_rate_limits = max_rate_limits
+        self.cooldown = cooldown
+        self.auth_cooldown = auth_cooldown
+
+    def choose(self) -> APIKey:
+        now = time.monotonic()
+        healthy = [key for key in self.keys if key.ejected_until <= now]
+
+        if not healthy:
+            # everything is ejected: use the key that comes back first
+            return min(self.keys, key=lambda key: key.ejected_until)
+
+        for key in healthy:
+            if key.ejected_reason:
+                logger.info(f"API key {key.label} back in rotation")
+                key.ejected_reason = None
+                key.consecutive_rate_limits = 0
+
+        chosen = max(
+            healthy, key=lambda key: (key.headroom(now), -key.in_flight, -key.last_used)
+        )
+        chosen.last_used = now
+        return chosen
+
+    def on_success(self, key: APIKey, headers, usage):
+        key.consecutive_rate_limits = 0
+        key.usage["requests"] += 1
+        key.usage["input_tokens"] += usage.input_tokens
+        key.usage["output_tokens"] += usage.output_tokens
+
+        key.requests_left = _fraction(headers, "requests")
+        key.tokens_left = _fraction(headers, "tokens")
+        key.limits_reset_at = time.monotonic() + self.cooldown
+
+    def on_rate_limited(self, key: APIKey, retry_after: Optional[float] = None):
+        key.usage["rate_limited"] += 1
+        key.consecutive_rate_limits += 1
+        key.requests_left = 0.0
+        key.limits_reset_at = time.monotonic() + (retry_after or self.cooldown)
+
+        if key.consecutive_rate_limits >= self.max_rate_limits:
+            self._eject(key, max(self.cooldown, retry_after or 0.0), "rate limited")
+
+    def on_auth_error(self, key: APIKey):
+        key.usage["auth_errors"] += 1
+        self._eject(key, self.auth_cooldown, "authentication failed")
+
+    def snapshot(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            key.label: {
+                **key.usage,
+                "in_flight": key.in_flight,
+                "headroom": round(key.headroom(now), 3),
+                "ejected_for": round(max(0.0, key.ejected_until - now), 1),
+                "ejected_reason": key.ejected_reason,
+            }
+            for key in self.keys
+        }
+
+    def _eject(self, key: APIKey, seconds: float, reason: str):
+        logger.warning(f"API key {key.label} out of rotation for {seconds:.0f}s ({reason})")
+        key.ejected_until = time.monotonic() + seconds
+        key.ejected_reason = reason
+        key.usage["ejections"] += 1
+
+
+def _fraction(headers, limit: str) -> Optional[float]:
+    """Remaining/limit from anthropic-ratelimit-{limit}-* headers"""
+    try:
+        remaining = float(headers[f"anthropic-ratelimit-{limit}-remaining"])
+        total = float(headers[f"anthropic-ratelimit-{limit}-limit"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return remaining / total if total else None
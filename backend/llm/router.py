@@ -0,0 +1,149 @@
+# backend/llm/router.py
+
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """
+    Maps each agent call type to a model tier, optionally as a cascade
+
+    A route lists tiers from cheapest to most capable, e.g.
+    {"tiers": ["small", "large"]}. The call layer tries the first tier and
+    escalates to the next one only when the answer fails schema validation
+    or is flagged low-confidence.
+
+    Cost-aware: when a route's cheap tier escalates more often than
+    `max_escalation_rate` over recent calls, the cheap attempt is only a
+    waste of latency, so the router starts at the next tier and sends just
+    every `probe_every`-th call to the cheap tier to notice when it recovers.
+
+    Per-route latency, tokens and escalation rates are recorded for tuning
+    the route table.
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, str],
+        routes: Dict[str, dict],
+        max_escalation_rate: float = 0.5,
+        window: int = 50,
+        probe_every: int = 10,
+    ):
+        self.tiers = tiers  # tier name -> model id
+        self.routes = routes  # call type -> {"tiers": [...]}
+        self.max_escalation_rate = max_escalation_rate
+        self.probe_every = probe_every
+
+        self._recent: Dict[str, Deque[bool]] = {
+            call_type: deque(maxlen=window) for call_type in routes
+        }
+        self._calls_since_probe: Dict[str, int] = {call_type: 0 for call_type in routes}
+        self.stats: Dict[str, dict] = {}
+
+    def models_for(self, call_type: str, default_model: str) -> List[str]:
+        """
+        Models to try for a call, in order
+
+        Args:
+            call_type: The agent method making the call
+            default_model: Model to use when the call type has no route
+
+        Returns:
+            list[str]: One model, or several for a cascade
+        """
+        route = self.routes.get(call_type)
+        if not route:
+            return [default_model]
+
+        models = [self.tiers[tier] for tier in route["tiers"]]
+        if len(models) > 1 and self._cheap_tier_unprofitable(call_type):
+            self._calls_since_probe[call_type] += 1
+            if self._calls_since_probe[call_type] < self.probe_every:
+                return models[1:]
+            self._calls_since_probe[call_type] = 0
+
+        return models
+
+    def record(
+        self,
+        call_type: str,
+        model: str,
+        latency: float,
+        input_tokens: int,
+        output_tokens: int,
+        accepted: bool,
+    ):
+        """Record one attempt of a call (one model in the cascade)"""
+        route_stats = self.stats.setdefault(
+            call_type, {"calls": 0, "escalations": 0, "models": {}}
+        )
+        model_stats = route_stats["models"].setdefault(
+            model,
+            {
+                "attempts": 0,
+                "rejected": 0,
+                "latency_total": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+            },
+        )
+        model_stats["attempts"] += 1
+        model_stats["latency_total"] += latency
+        model_stats["input_tokens"] += input_tokens
+        model_stats["output_tokens"] += output_tokens
+        if not accepted:
+            model_stats["rejected"] += 1
+
+    def record_call(self, call_type: str, models_tried: List[str], escalated: bool):
+        """Record the outcome of a whole (possibly cascaded) call"""
+        route_stats = self.stats.setdefault(
+            call_type, {"calls": 0, "escalations": 0, "models": {}}
+        )
+        route_stats["calls"] += 1
+        if escalated:
+            route_stats["escalations"] += 1
+            logger.info(f"Route {call_type} escalated: {' -> '.join(models_tried)}")
+
+        # only calls that started at the cheap tier say anything about it
+        route = self.routes.get(call_type)
+        if route and len(route["tiers"]) > 1:
+            if models_tried[0] == self.tiers[route["tiers"][0]]:
+                self._recent[call_type].append(escalated)
+
+    def avg_output_tokens(self, call_type: str, model: str) -> float:
+        """Average output tokens of a route's attempts on a model (0 if unknown)"""
+        model_stats = self.stats.get(call_type, {}).get("models", {}).get(model)
+        if not model_stats or not model_stats["attempts"]:
+            return 0.0
+        return model_stats["output_tokens"] / model_stats["attempts"]
+
+    def snapshot(self) -> dict:
+        """Per-route stats with averages and escalation rates filled in"""
+        report = {}
+        for call_type, route_stats in self.stats.items():
+            models = {}
+            for model, s in route_stats["models"].items():
+                models[model] = {
+                    **s,
+                    "avg_latency": round(s["latency_total"] / s["attempts"], 3),
+                }
+            report[call_type] = {
+                "calls": route_stats["calls"],
+                "escalations": route_stats["escalations"],
+                "escalation_rate": round(
+                    route_stats["escalations"] / max(1, route_stats["calls"]), 3
+                ),
+                "cheap_tier_skipped": self._cheap_tier_unprofitable(call_type),
+                "models": models,
+            }
+        return report
+
+    def _cheap_tier_unprofitable(self, call_type: str) -> bool:
+        recent: Optional[Deque[bool]] = self._recent.get(call_type)
+        if not recent or len(recent) < 10:
+            return False
+        return sum(recent) / len(recent) > self.max_escalation_rate
@@ -0,0 +1,87 @@
+# backend/llm/scheduling.py
+
+import asyncio
+import heapq
+import itertools
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# served strictly in this order
+PRIORITIES = ("interactive", "optional", "background")
+
+# game session the current call belongs to (set by the engine)
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+# overrides the call type's priority class (set by background pools)
+current_priority: ContextVar[Optional[str]] = ContextVar("current_priority", default=None)
+
+
+class FairQueue:
+    """
+    Requests waiting for a concurrency slot
+
+    Higher priority classes are always served first. Inside a class, sessions
+    share the slots by weighted fair queuing: each waiter gets a virtual
+    finish time of max(class virtual time, session's last finish) + 1/weight
+    and the smallest finish time goes next, so a session that floods the
+    queue only delays its own requests.
+
+    Cancelled waiters are dropped lazily when they come up.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[str, List[Tuple[float, int, float, asyncio.Future]]] = {
+            priority: [] for priority in PRIORITIES
+        }
+        self._virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: Dict[Tuple[str, Optional[str]], float] = {}
+        self._order = itertools.count()
+
+    def push(
+        self,
+        waiter: asyncio.Future,
+        priority: str,
+        session_id: Optional[str],
+        weight: float = 1.0,
+    ):
+        key = (priority, session_id)
+        start = max(self._virtual_time[priority], self._last_finish.get(key, 0.0))
+        finish = start + 1.0 / weight
+        self._last_finish[key] = finish
+        heapq.heappush(self._heaps[priority], (finish, next(self._order), start, waiter))
+
+        if len(self._last_finish) > 1000:
+            self._forget_idle_sessions()
+
+    def pop(self, eligible: Callable[[str], bool]) -> Optional[asyncio.Future]:
+        """Next live waiter of the highest priority class that `eligible` allows"""
+        for priority in PRIORITIES:
+            if not eligible(priority):
+                continue
+            heap = self._heaps[priority]
+            while heap:
+                _, _, start, waiter = heapq.heappop(heap)
+                if waiter.done():
+                    continue
+                self._virtual_time[priority] = max(self._virtual_time[priority], start)
+                return waiter
+        return None
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        """Live waiters in `priority` and every class above it (all if None)"""
+        classes = (
+            PRIORITIES[: PRIORITIES.index(priority) + 1] if priority else PRIORITIES
+        )
+        return sum(
+            1
+            for p in classes
+            for _, _, _, waiter in self._heaps[p]
+            if not waiter.done()
+        )
+
+    def _forget_idle_sessions(self):
+        # a session whose last finish is behind the clock starts from the clock anyway
+        self._last_finish = {
+            (priority, session_id): finish
+            for (priority, session_id), finish in self._last_finish.items()
+            if finish > self._virtual_time[priority]
+        }
@@ -0,0 +1,196 @@
+# backend/log_pipeline.py
+
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from backend.llm.scheduling import current_session
+from backend.tracing import current_span
+
+# X-Request-ID of the request being handled (set by CorrelationMiddleware)
+current_request: ContextVar[Optional[str]] = ContextVar("current_request", default=None)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands log records to a background thread instead of writing them
+
+    Runs on the event loop, so it only does what cannot wait: it reads
+    the correlation ids (session, request, trace and span; they live in
+    the caller's context), renders the message, decides whether a large
+    payload is sampled out, and enqueues.
+    A full queue drops the record instead of blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue, payload_sample_rate: float = 1.0):
+        super().__init__(log_queue)
+        self.payload_sample_rate = payload_sample_rate
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        record.session_id = current_session.get()
+        record.request_id = current_request.get()
+        span = current_span.get()
+        record.trace_id = span.trace_id if span else None
+        record.span_id = span.span_id if span else None
+
+        if (
+            getattr(record, "payload", None) is not None
+            and random.random() >= self.payload_sample_rate
+        ):
+            record.payload = None
+            record.payload_sampled_out = True
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, long messages and payloads truncated"""
+
+    def __init__(self, max_message_chars: int = 1000, max_payload_chars: int = 2000):
+        super().__init__()
+        self.max_message_chars = max_message_chars
+        self.max_payload_chars = max_payload_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _truncate(record.getMessage(), self.max_message_chars),
+            "session_id": getattr(record, "session_id", None),
+            "request_id": getattr(record, "request_id", None),
+            "trace_id": getattr(record, "trace_id", None),
+            "span_id": getattr(record, "span_id", None),
+        }
+
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            encoded = json.dumps(payload, default=str)
+            if len(encoded) > self.max_payload_chars:
+                entry["payload"] = _truncate(encoded, self.max_payload_chars)
+                entry["payload_truncated"] = True
+            else:
+                entry["payload"] = payload
+        elif getattr(record, "payload_sampled_out", False):
+            entry["payload_sampled_out"] = True
+
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more chars)"
+
+
+class LogPipeline:
+    """
+    Root logging through a bounded queue to a background writer thread
+
+    install() routes every logger to the queue right away; records wait
+    there until start() launches the writer, and stop() flushes it.
+    Log calls carry a payload with `extra={"payload": obj}`; payloads
+    are kept for `payload_sample_rate` of the records and truncated to
+    `max_payload_chars` once encoded.
+    """
+
+    def __init__(
+        self,
+        level: str = "INFO",
+        queue_size: int = 10000,
+        payload_sample_rate: float = 1.0,
+        max_message_chars: int = 1000,
+        max_payload_chars: int = 2000,
+        stream=None,
+    ):
+        self.level = level
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = AsyncQueueHandler(self.queue, payload_sample_rate)
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JSONFormatter(max_message_chars, max_payload_chars))
+        self.listener = QueueListener(self.queue, writer)
+        self._running = False
+
+    def install(self):
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        if self.handler not in root.handlers:
+            root.addHandler(self.handler)
+
+    def start(self):
+        if not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        if self._running:
+            self.listener.stop()
+            self._running = False
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "running": self._running,
+        }
+
+
+class CorrelationMiddleware:
+    """
+    ASGI middleware giving every HTTP request a correlation id
+
+    The client's X-Request-ID (or a new one) is put in current_request for
+    the request's log records and echoed back in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (
+                value.decode("latin-1")
+                for name, value in scope["headers"]
+                if name == b"x-request-id"
+            ),
+            None,
+        ) or uuid.uuid4().hex
+        current_request.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
@@ -1,11 +1,334 @@
-from fastapi import FastAPI, APIRouter, Request
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
+
+from fastapi import FastAPI, APIRouter, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from backend.game_engine import OrganicMultiAgentEngine
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from backend.admission import AdmissionController, ServerBusy
+from backend.idempotency import AlreadyApplied, IdempotencyCache
+from backend.log_pipeline import CorrelationMiddleware, LogPipeline, current_request
+from backend.llm.scheduling import current_session
+from backend.metrics import REGISTRY, Gauge
+from backend.tracing import TRACER, ZipkinExporter
+from backend.server_timing import ServerTimingMiddleware
+from backend.telemetry import LatencyBreakdown
+from backend.game_engine import MomentInFlight, OrganicMultiAgentEngine
+from backend.models.session_profile import SessionProfile
+from backend.llm.client import peek_default_client
+from backend.pools.opening_pool import OpeningScenePool
+from backend.views import DEFAULT_VIEW, VIEWS
+
+from config import (
+    SCENARIO,
+    NARRATOR,
+    OPENING_POOL,
+    SESSION_PROFILES,
+    DEFAULT_PROFILE,
+    MAX_SESSIONS,
+    ADMISSION,
+    IDEMPOTENCY,
+    LOGGING,
+    TRACING,
+    TELEMETRY,
+)
+
+# JSON logs written by a background thread, never on the request path
+log_pipeline = LogPipeline(
+    level=LOGGING["level"],
+    queue_size=LOGGING["queue_size"],
+    payload_sample_rate=LOGGING["payload_sample_rate"],
+    max_message_chars=LOGGING["max_message_chars"],
+    max_payload_chars=LOGGING["max_payload_chars"],
+)
+log_pipeline.install()
+
+# moment traces exported as Zipkin v2 JSON by a background thread
+trace_exporter = (
+    ZipkinExporter(
+        service_name=TRACING["service_name"],
+        path=TRACING["path"],
+        max_bytes=TRACING["max_bytes"],
+        backups=TRACING["backups"],
+        collector_url=TRACING["collector_url"],
+        queue_size=TRACING["queue_size"],
+        batch_size=TRACING["batch_size"],
+    )
+    if TRACING["enabled"]
+    else None
+)
+TRACER.sample_rate = TRACING["sample_rate"]
+TRACER.exporter = trace_exporter
+
+logger = logging.getLogger(__name__)
+
+opening_pool = (
+    OpeningScenePool(
+        scenarios=[SCENARIO],
+        narrator_config=NARRATOR,
+        depth=OPENING_POOL["depth"],
+        ttl_seconds=OPENING_POOL["ttl_seconds"],
+        path=OPENING_POOL["path"],
+    )
+    if OPENING_POOL["enabled"]
+    else None
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_pipeline.start()
+    if trace_exporter:
+        trace_exporter.start()
+    # background refill of pre-generated openings
+    if opening_pool:
+        opening_pool.start()
+    yield
+    if opening_pool:
+        await opening_pool.stop()
+    if trace_exporter:
+        trace_exporter.stop()
+    log_pipeline.stop()
+
+
+# server time of game requests, matched with what browsers report
+latency = LatencyBreakdown(
+    pending=TELEMETRY["pending_requests"], recent=TELEMETRY["recent_reports"]
+)
+
+
+def record_server_time(path: str, status: int, seconds: float):
+    if 200 <= status < 300:
+        latency.record_server(current_request.get(), path, seconds)
+
 
 # start FastAPI server
-app = FastAPI()
-engine = OrganicMultiAgentEngine(api_keys=[])
+app = FastAPI(lifespan=lifespan)
+# per-stage Server-Timing on the game endpoints
+app.add_middleware(
+    ServerTimingMiddleware,
+    paths=TELEMETRY["timed_paths"],
+    on_response=record_server_time,
+)
+# X-Request-ID on every request and log record (outermost, added last)
+app.add_middleware(CorrelationMiddleware)
+
+# one engine per game session, least recently used first
+sessions: "OrderedDict[str, OrganicMultiAgentEngine]" = OrderedDict()
+
+# cap on concurrently running /api/start + /api/play, the rest wait in line
+admission = AdmissionController(
+    max_in_flight=ADMISSION["max_in_flight"],
+    max_queue=ADMISSION["max_queue"],
+    max_wait=ADMISSION["max_wait"],
+)
+
+# /api/play results by (session, Idempotency-Key), retries never run twice
+idempotency = IdempotencyCache(
+    max_entries=IDEMPOTENCY["max_entries"],
+    ttl_seconds=IDEMPOTENCY["ttl_seconds"],
+)
+
+
+# read at scrape time, nothing to keep in sync
+REGISTRY.register(
+    Gauge("active_sessions", "Game sessions in memory", lambda: {(): len(sessions)})
+)
+REGISTRY.register(
+    Gauge(
+        "admission_requests",
+        "Game requests running or waiting for admission (state: running, waiting)",
+        lambda: {
+            ("running",): admission.in_flight,
+            ("waiting",): admission.snapshot()["waiting"],
+        },
+        labels=("state",),
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "llm_queue_depth",
+        "LLM calls waiting for a concurrency slot per model",
+        lambda: {
+            (model,): limiter.snapshot()["waiting"]
+            for model, limiter in llm_limiters().items()
+        },
+        labels=("model",),
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "log_queue_depth",
+        "Log records waiting for the writer thread",
+        lambda: {(): log_pipeline.queue.qsize()},
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "trace_queue_depth",
+        "Finished spans waiting for the exporter thread",
+        lambda: {(): trace_exporter.queue.qsize()} if trace_exporter else {},
+    )
+)
+
+
+def llm_limiters() -> dict:
+    """Per-model concurrency limiters of the call layer (none before any call)"""
+    llm = peek_default_client()
+    return llm.limiters if llm else {}
+
+
+def get_session(session_id: str):
+    engine = sessions.get(session_id)
+    if engine:
+        sessions.move_to_end(session_id)
+    return engine
+
+
+async def read_json(request: Request) -> dict:
+    """Request body as a dict, empty if there is no (valid) JSON body"""
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def request_ticket(request: Request) -> str:
+    """Client-chosen id for this request (polled at /api/queue/{ticket})"""
+    return current_request.get() or uuid.uuid4().hex
+
+
+# moments abandoned because the client went away
+disconnects = {"cancelled_moments": 0}
+
+
+async def unless_disconnected(request: Request, coro, poll_seconds: float = 0.5):
+    """
+    Await `coro`, cancelling it if the client disconnects meanwhile
+
+    Returns None when the client is gone (nobody is left to answer)
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                disconnects["cancelled_moments"] += 1
+                logger.info("Client disconnected, cancelling moment")
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def run_game_request(request: Request, coro):
+    """
+    Await a game request's work (played in an admission slot by `coro`)
+
+    The work is cancelled if the client disconnects. Refusals become
+    responses: 429 when the server is busy, 409 when the session is already
+    playing a moment or the moment was already played, 499 when the client
+    is gone.
+    """
+    try:
+        result = await unless_disconnected(request, coro)
+    except ServerBusy as busy:
+        return busy_response(busy)
+    except MomentInFlight:
+        return JSONResponse(
+            {"error": "A moment is still playing in this session, retry after it"},
+            status_code=409,
+        )
+    except AlreadyApplied:
+        return JSONResponse(
+            {"error": "This moment was already played, fetch /api/state"},
+            status_code=409,
+        )
+
+    if result is None:
+        return JSONResponse({"error": "Client disconnected"}, status_code=499)
+    return result
+
+
+def requested_view(payload: dict):
+    """
+    (view, fields) asked for in a request body, view None if unknown
+
+    "view" is player (default), spectator or debug; "fields" optionally
+    narrows the response to a list of top-level fields.
+    """
+    view = VIEWS.get(payload.get("view") or DEFAULT_VIEW)
+    fields = payload.get("fields")
+    return view, (set(fields) if isinstance(fields, list) else None)
+
+
+def unknown_view() -> dict:
+    return {"error": f"Unknown view, expected one of {', '.join(VIEWS)}"}
+
+
+def event_message(payload: dict) -> Tuple[bool, Optional[str]]:
+    """(valid, message) of the player event in a request, message may be missing"""
+    event = payload.get("event") or {}
+    if not isinstance(event, dict):
+        return False, None
+    message = event.get("message")
+    return message is None or isinstance(message, str), message
+
+
+def invalid_event() -> JSONResponse:
+    return JSONResponse(
+        {"error": "event must be an object with a string message"}, status_code=400
+    )
+
+
+def valid_state_version(payload: dict) -> bool:
+    """The client's state_version is optional, an integer when sent"""
+    version = payload.get("state_version")
+    return version is None or (
+        isinstance(version, int) and not isinstance(version, bool)
+    )
+
+
+def invalid_state_version() -> JSONResponse:
+    return JSONResponse(
+        {"error": "state_version must be an integer"}, status_code=400
+    )
+
+
+def request_timeout_ms(profile: SessionProfile) -> int:
+    """
+    How long the browser should wait for a moment of this profile
+
+    The longest the server can take: the moment budget plus the longest
+    admission wait, with a margin for the stages that run after the budget
+    (they only get what is left of it) and the network.
+    """
+    seconds = (
+        profile.moment_budget
+        + ADMISSION["max_wait"]
+        + ADMISSION["client_timeout_margin"]
+    )
+    return int(seconds * 1000)
+
+
+def busy_response(busy: ServerBusy) -> JSONResponse:
+    return JSONResponse(
+        {"error": str(busy), "retry_after": busy.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(busy.retry_after)},
+    )
 
 # =======================================================
 # =======================================================
@@ -17,6 +340,14 @@ engine = OrganicMultiAgentEngine(api_keys=[])
 app.mount("/assets", StaticFiles(directory="./frontend/assets"), name="assets")
 
 
+# Prometheus scrape target
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 # root route return frontend html with assets
 @app.get("/")
 def root():
@@ -38,27 +369,274 @@ def status():
     return {"message": "THE SERVER IS ON, OK??", "status": "OK"}
 
 
+# The LLM stats below are empty until the call layer has been used
+# (it needs an API key to exist, the stats endpoints must not).
+
+
+# per-route model routing stats (latency, tokens, escalations)
+@api.get("/routing")
+def routing():
+    llm = peek_default_client()
+    return llm.router.snapshot() if llm else {}
+
+
+# request hedging stats (hedge rate, wins, estimated time saved)
+@api.get("/hedging")
+def hedging():
+    llm = peek_default_client()
+    return llm.hedging.snapshot() if llm and llm.hedging else {"enabled": False}
+
+
+# per-model adaptive concurrency limits (limit, in flight, overloads)
+@api.get("/concurrency")
+def concurrency():
+    return {model: limiter.snapshot() for model, limiter in llm_limiters().items()}
+
+
+# place in the admission queue of a waiting /api/start or /api/play
+@api.get("/queue/{ticket}")
+def queue_position(ticket: str):
+    return {"position": admission.position(ticket), **admission.snapshot()}
+
+
+# moments and LLM requests cancelled mid-flight, with output tokens saved
+@api.get("/cancellations")
+def cancellations():
+    llm = peek_default_client()
+    return {**disconnects, **(llm.cancellations if llm else {})}
+
+
+# log queue depth and records dropped because it was full
+@api.get("/logging")
+def logging_stats():
+    return log_pipeline.snapshot()
+
+
+# browser timing of a game request: response received, first word on screen
+@api.post("/telemetry")
+async def telemetry(request: Request):
+    payload = await read_json(request)
+
+    timings = [payload.get("response_ms"), payload.get("first_word_ms")]
+    if not isinstance(payload.get("request_id"), str) or not all(
+        isinstance(ms, (int, float)) and 0 <= ms < TELEMETRY["max_report_ms"]
+        for ms in timings
+    ):
+        return {"error": "Invalid timing report"}
+
+    latency.report(payload["request_id"], *timings)
+    return Response(status_code=204)
+
+
+# latency players feel, split into server, network and render (p50/p95)
+@api.get("/telemetry")
+def telemetry_stats():
+    return latency.snapshot()
+
+
+# per-API-key usage, headroom and health
+@api.get("/keys")
+def keys():
+    llm = peek_default_client()
+    return llm.keys.snapshot() if llm else {}
+
+
 @api.post("/start")
-async def start_game():
-    return await engine.start_game()
+async def start_game(request: Request):
+    payload = await read_json(request)
+
+    profile_name = payload.get("profile") or DEFAULT_PROFILE
+    if profile_name not in SESSION_PROFILES:
+        return {"error": f"Unknown profile '{profile_name}'"}
+
+    view, fields = requested_view(payload)
+    if not view:
+        return unknown_view()
+
+    session_id = uuid.uuid4().hex
+    engine = OrganicMultiAgentEngine(
+        api_keys=[],
+        opening_pool=opening_pool,
+        profile=SessionProfile.from_config(
+            profile_name, SESSION_PROFILES[profile_name]
+        ),
+        session_id=session_id,
+    )
+    try:
+        async with admission.admit(request_ticket(request)):
+            result = await engine.start_game(view, fields)
+    except ServerBusy as busy:
+        return busy_response(busy)
+
+    sessions[session_id] = engine
+    while len(sessions) > MAX_SESSIONS:
+        sessions.popitem(last=False)
+
+    return {
+        "session_id": session_id,
+        "profile": profile_name,
+        "request_timeout_ms": request_timeout_ms(engine.profile),
+        **result,
+    }
 
 
 @api.post("/play")
-async def play(request: Request):
-    payload = await request.json()
+async def play(request: Request, response: Response):
+    payload = await read_json(request)
+    if not payload:
+        return JSONResponse(
+            {"error": "Request body must be a JSON object"}, status_code=400
+        )
 
-    event = payload.get("event", {})
-    message = event.get("message")
+    session_id = payload.get("session_id")
+    engine = get_session(session_id)
+    if not engine:
+        return {"error": "Unknown or expired session, start a new game"}
 
+    valid, message = event_message(payload)
+    if not valid:
+        return invalid_event()
     if not message:
         return {"error": "No message provided"}
 
-    print(event)
-    result = await engine.process_moment(message)
+    view, fields = requested_view(payload)
+    if not view:
+        return unknown_view()
+    # checked before the moment: a bad version must not fail it after commit
+    if not valid_state_version(payload):
+        return invalid_state_version()
+
+    # this request's log records (and the moment's) carry the session id
+    current_session.set(session_id)
+    logger.info("Player event", extra={"payload": payload["event"]})
+
+    started = {}
+
+    async def run_moment():
+        async with admission.admit(request_ticket(request)):
+            # no await until process_moment has claimed the session
+            started["commits"] = engine.commits
+            return await engine.process_moment(
+                message,
+                known_version=payload.get("state_version"),
+                view=view,
+                fields=fields,
+            )
+
+    def moment_applied() -> bool:
+        # committed even though the request then failed: a retry must not replay it
+        return "commits" in started and engine.commits > started["commits"]
+
+    async def run_once():
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return await run_moment()
+
+        result, replayed = await idempotency.run(
+            (session_id, key), run_moment, applied=moment_applied
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
 
-    print(result)
+    result = await run_game_request(request, run_once())
+    if isinstance(result, JSONResponse):
+        return result
+
+    logger.info("Moment played", extra={"payload": result})
 
     return result
 
 
+@api.get("/state/{session_id}")
+def state(session_id: str, view: str = DEFAULT_VIEW):
+    """Full state snapshot and its version (responses otherwise carry patches)"""
+    engine = get_session(session_id)
+    if not engine:
+        return {"error": "Unknown or expired session, start a new game"}
+    if view not in VIEWS:
+        return unknown_view()
+    return engine.state_snapshot(VIEWS[view])
+
+
+@api.post("/rewind")
+async def rewind(request: Request):
+    payload = await read_json(request)
+
+    engine = get_session(payload.get("session_id"))
+    if not engine:
+        return {"error": "Unknown or expired session, start a new game"}
+
+    moment = payload.get("moment")
+    if not isinstance(moment, int):
+        return {"error": "No moment provided"}
+
+    view, _ = requested_view(payload)
+    if not view:
+        return unknown_view()
+    if not valid_state_version(payload):
+        return invalid_state_version()
+
+    async def run_rewind():
+        async with admission.admit(request_ticket(request)):
+            return await engine.rewind(
+                moment, known_version=payload.get("state_version"), view=view
+            )
+
+    return await run_game_request(request, run_rewind())
+
+
+@api.post("/branch")
+async def branch(request: Request):
+    """
+    "What if": a new session forked from the end of `moment`, optionally
+    playing a different message right away. The original is left as is.
+    """
+    payload = await read_json(request)
+
+    session_id = payload.get("session_id")
+    engine = get_session(session_id)
+    if not engine:
+        return {"error": "Unknown or expired session, start a new game"}
+
+    moment = payload.get("moment", engine.state.moment_count)
+    if moment not in engine.checkpoints:
+        return {"error": f"No checkpoint for moment {moment}"}
+
+    valid, message = event_message(payload)
+    if not valid:
+        return invalid_event()
+
+    view, fields = requested_view(payload)
+    if not view:
+        return unknown_view()
+
+    branch_id = uuid.uuid4().hex
+    branched = engine.branch(moment, branch_id)
+    sessions[branch_id] = branched
+    while len(sessions) > MAX_SESSIONS:
+        sessions.popitem(last=False)
+
+    result = branched.state_snapshot(view)
+    if message:
+
+        async def run_moment():
+            async with admission.admit(request_ticket(request)):
+                return await branched.process_moment(
+                    message, view=view, fields=fields
+                )
+
+        # played like /api/play: admission slot, dropped if the client leaves
+        result = await run_game_request(request, run_moment())
+        if isinstance(result, JSONResponse):
+            return result
+
+    return {
+        "session_id": branch_id,
+        "branched_from": session_id,
+        "moment": moment,
+        **result,
+    }
+
+
 app.include_router(api)
@@ -0,0 +1,211 @@
+# backend/metrics.py
+
+import bisect
+import functools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# seconds, from a quick local check to a slow Sonnet call
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _labels(self, key: LabelValues, extra: str = "") -> str:
+        pairs = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{self._labels(key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (last one is +Inf)], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts, total = self._values.setdefault(
+            key, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = self._labels(key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {total[0]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Read when scraped: `read()` returns {label values tuple: value}"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Dict[LabelValues, float]],
+        labels: Iterable[str] = (),
+    ):
+        super().__init__(name, help, labels)
+        self.read = read
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{self._labels(key)} {value}"
+            for key, value in self.read().items()
+        ]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """Metrics in registration order, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_CALL_SECONDS = REGISTRY.register(
+    Histogram(
+        "llm_call_seconds",
+        "Agent LLM call latency, cascade attempts and retries included",
+        labels=("agent", "call_type", "model"),
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "llm_tokens_total",
+        "Tokens billed per model (kind: input, output, cache_read, cache_write)",
+        labels=("model", "kind"),
+    )
+)
+LLM_REQUEST_ERRORS = REGISTRY.register(
+    Counter(
+        "llm_request_errors_total",
+        "Failed API requests per model and error class (each retry counts)",
+        labels=("model", "error"),
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "moment_stage_seconds",
+        "process_moment stage latency (outcome: ok, degraded, skipped)",
+        labels=("stage", "outcome"),
+    )
+)
+MOMENT_SECONDS = REGISTRY.register(
+    Histogram(
+        "moment_seconds",
+        "Whole process_moment latency (outcome: ok, rolled_back)",
+        labels=("outcome",),
+    )
+)
+PLAYER_LATENCY_SECONDS = REGISTRY.register(
+    Histogram(
+        "player_latency_seconds",
+        "Latency players feel per game endpoint, from browser reports "
+        "(part: server, network, render, total)",
+        labels=("endpoint", "part"),
+        buckets=(0.01, 0.025, 0.05) + LATENCY_BUCKETS,
+    )
+)
+FALLBACKS = REGISTRY.register(
+    Counter(
+        "fallbacks_total",
+        "Fallback activations per _fallback_* path",
+        labels=("path",),
+    )
+)
+
+
+def counts_fallback(method: Callable) -> Callable:
+    """Count every call of an agent's _fallback_* method in FALLBACKS"""
+    path = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        FALLBACKS.inc(path=path)
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+def record_usage(model: str, usage: Optional[object]):
+    """Add one API response's token usage to LLM_TOKENS"""
+    if usage is None:
+        return
+    for kind, field in (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_input_tokens"),
+        ("cache_write", "cache_creation_input_tokens"),
+    ):
+        tokens = getattr(usage, field, None)
+        if tokens:
+            LLM_TOKENS.inc(tokens, model=model, kind=kind)
@@ -0,0 +1,120 @@
+from typing import Any, Callable, List
+
+from backend.models.game_state import Event, EventLog, GameState
+
+
+class ChangeSet:
+    """
+    Every state change of one moment, applied together at commit
+
+    The moment pipeline reads and writes through the change set as if it
+    were the GameState: attribute writes and logged events are staged and
+    visible to the later stages of the same moment, everything else reads
+    through to the real state. Changes to other objects (NPC and narrator
+    state) are deferred by the agents as callables; NPC changes get the
+    NPC through GameState.npc_for_write so forks of the state stay intact.
+
+    commit() applies it all in order without yielding to the event loop, so
+    nothing ever sees a half-applied moment. abort() only drops the staged
+    changes; the real state was never touched.
+    """
+
+    def __init__(self, state: GameState):
+        object.__setattr__(self, "_state", state)
+        object.__setattr__(self, "_fields", {})
+        object.__setattr__(self, "_events", [])  # (Event, log_event kwargs)
+        object.__setattr__(self, "_deferred", [])  # (change, args, npc_id)
+        object.__setattr__(self, "closed", False)
+
+    # =========================================================================
+    # STAGED VIEW OF THE GAME STATE
+    # =========================================================================
+
+    def __getattr__(self, name: str) -> Any:
+        fields = self._fields
+        if name in fields:
+            return fields[name]
+        return getattr(self._state, name)
+
+    def __setattr__(self, name: str, value: Any):
+        self._check_open()
+        self._fields[name] = value
+
+    @property
+    def event_log(self) -> EventLog:
+        log = self._state.event_log.fork()
+        log.extend(event for event, _ in self._events)
+        return log
+
+    # same narrative as the real state, staged events included
+    get_recent_narrative = GameState.get_recent_narrative
+
+    def log_event(
+        self,
+        event_type: str,
+        actor: str,
+        description: str,
+        location: str,
+        participants: List[str] = None,
+    ):
+        """Stage an event (NPC knowledge is updated when it is committed)"""
+        self._check_open()
+        kwargs = dict(
+            event_type=event_type,
+            actor=actor,
+            description=description,
+            location=location,
+            participants=participants,
+        )
+        event = Event(
+            moment=self.moment_count,
+            event_type=event_type,
+            actor=actor,
+            description=description,
+            location=location,
+            participants=participants or [actor],
+        )
+        self._events.append((event, kwargs))
+
+    # =========================================================================
+    # DEFERRED CHANGES, COMMIT, ABORT
+    # =========================================================================
+
+    def defer(self, change: Callable, *args):
+        """Run `change(*args)` at commit, after the staged fields and events"""
+        self._check_open()
+        self._deferred.append((change, args, None))
+
+    def defer_npc(self, npc_id: str, change: Callable, *args):
+        """Run `change(*args, npc)` at commit on a writable copy of the NPC"""
+        self._check_open()
+        self._deferred.append((change, args, npc_id))
+
+    def commit(self):
+        self._check_open()
+        state = self._state
+
+        for name, value in self._fields.items():
+            setattr(state, name, value)
+        for _, kwargs in self._events:
+            state.log_event(**kwargs)
+        for change, args, npc_id in self._deferred:
+            if npc_id is None:
+                change(*args)
+            else:
+                change(*args, state.npc_for_write(npc_id))
+
+        object.__setattr__(self, "closed", True)
+
+    def abort(self):
+        self._fields.clear()
+        self._events.clear()
+        self._deferred.clear()
+        object.__setattr__(self, "closed", True)
+
+    def __len__(self) -> int:
+        return len(self._fields) + len(self._events) + len(self._deferred)
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError("Change set already committed or aborted")
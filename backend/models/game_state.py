@@ -1,11 +1,12 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Iterator, List, Dict, Optional, Set
 from datetime import datetime
 from backend.models.npc_state import NPCState
+from backend.models.serialization import SerializationCache
 
 
 @dataclass
-class Event:
+class Event(SerializationCache):
     """A single event in the story"""
 
     moment: int
@@ -17,6 +18,9 @@ class Event:
     timestamp: datetime = field(default_factory=datetime.now)
 
     def to_dict(self):
+        return self._cached("dict", self._build_dict)
+
+    def _build_dict(self):
         return {
             "moment": self.moment,
             "type": self.event_type,
@@ -27,6 +31,55 @@ class Event:
         }
 
 
+class EventLog:
+    """
+    Append-only event log that forks in O(1)
+
+    A fork keeps a reference to its parent and the parent's length at the
+    time of the fork, plus a tail of its own events. Parent and fork can
+    both keep appending; neither sees the other's new events, and no event
+    is ever copied.
+    """
+
+    def __init__(self, events: Iterable[Event] = ()):
+        self._base: Optional[EventLog] = None
+        self._base_len = 0
+        self._tail: List[Event] = list(events)
+
+    def fork(self) -> "EventLog":
+        child = EventLog()
+        child._base = self
+        child._base_len = len(self)
+        return child
+
+    def append(self, event: Event):
+        self._tail.append(event)
+
+    def extend(self, events: Iterable[Event]):
+        self._tail.extend(events)
+
+    def __len__(self) -> int:
+        return self._base_len + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._at(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return self._at(index)
+
+    def __iter__(self) -> Iterator[Event]:
+        return (self._at(i) for i in range(len(self)))
+
+    def _at(self, index: int) -> Event:
+        log = self
+        while index < log._base_len:
+            log = log._base
+        return log._tail[index - log._base_len]
+
+
 @dataclass
 class GameState:
     """Complete game state"""
@@ -39,7 +92,7 @@ class GameState:
     moment_count: int = 0
     player_location: str = "main_scene"
     npcs: Dict[str, NPCState] = field(default_factory=dict)  # npc_id, NPCState
-    event_log: List[Event] = field(default_factory=list)
+    event_log: EventLog = field(default_factory=EventLog)
 
     # scene tracking
     scene_energy: str = "building"  # building, plateau, climactic, resolving
@@ -55,6 +108,39 @@ class GameState:
     # safety rails
     max_moments: int = 30  # soft limit to the amount of turns
 
+    # copy-on-write bookkeeping, see fork()
+    _shared: bool = field(default=False, init=False, repr=False, compare=False)
+    _owned: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def fork(self) -> "GameState":
+        """
+        O(1) snapshot that shares everything with this state
+
+        Both states treat their NPCs as shared from here on; the first write
+        to an NPC (through npc_for_write) copies just that NPC into the
+        state doing the write. Events logged afterwards stay on their side.
+        """
+        child = replace(self, event_log=self.event_log.fork())
+        self._shared = child._shared = True
+        self._owned = set()
+        return child
+
+    def npc_for_write(self, npc_id: str) -> NPCState:
+        """The NPC, copied first if it is still shared with another fork"""
+        npc = self.npcs[npc_id]
+        if not self._shared or npc_id in self._owned:
+            return npc
+
+        if not self._owned:
+            # first write since the fork, the dict itself is shared too
+            self.npcs = dict(self.npcs)
+        # knowledge is replaced on every change (NPCState.remember), only
+        # the relationships dict could still be changed in place
+        npc = replace(npc, relationships=dict(npc.relationships))
+        self.npcs[npc_id] = npc
+        self._owned.add(npc_id)
+        return npc
+
     def to_dict(self):
         return {
             "scenario_name": self.scenario_name,
@@ -88,6 +174,35 @@ class GameState:
             "conclusion_description": self.conclusion_description,
         }
 
+    @classmethod
+    def from_scenario(cls, scenario: dict) -> "GameState":
+        """Build a fresh game state (NPCs included) from a scenario config dict"""
+        state = cls(
+            scenario_name=scenario["name"],
+            situation_description=scenario["situation"],
+            player_role=scenario["player_role"],
+        )
+
+        for npc_config in scenario["npcs"]:
+            npc = NPCState(
+                npc_id=npc_config["id"],
+                name=npc_config["name"],
+                personality=npc_config["personality"],
+                current_goal=npc_config["goal"],
+                secrets=npc_config["secrets"],
+                urgency_level=npc_config["starting_urgency"],
+            )
+            state.npcs[npc.npc_id] = npc
+
+        state.log_event(
+            event_type="gm_stimulus",
+            actor="environment",
+            description="The situation begins.",
+            location=state.player_location,
+        )
+
+        return state
+
     def log_event(
         self,
         event_type: str,
@@ -109,14 +224,11 @@ class GameState:
         self.event_log.append(event)
 
         # update NPC knowledge if they can perceive it
-        for npc in self.npcs.values():
+        for npc_id, npc in list(self.npcs.items()):
             if npc.can_perceive_event(event.to_dict()):
                 knowledge_entry = f"[Moment {self.moment_count}] {description}"
-                npc.knowledge.append(knowledge_entry)
-
                 # remember the 10 most recent events
-                if len(npc.knowledge) > 10:
-                    npc.knowledge = npc.knowledge[-10:]
+                self.npc_for_write(npc_id).remember(knowledge_entry, keep=10)
 
     def get_recent_narrative(self, n: int = 3) -> str:
         """Get last N events as narrative"""
@@ -21,6 +21,20 @@ class NarratorState:
 
     narrator_goal: Optional[str] = None 
 
+    @classmethod
+    def from_config(cls, narrator: dict) -> "NarratorState":
+        """Build a fresh narrator state from a narrator config dict"""
+        return cls(
+            narrator_id=narrator["style"],
+            name=narrator["name"],
+            personality=narrator["personality"],
+            narrative_style=narrator["voice"],
+            blind_spots=narrator["blind_spots"],
+            obsessions=narrator["obsessions"],
+            misbeliefs=narrator.get("misbeliefs", []),
+            reliability=narrator["starting_reliability"],
+        )
+
     def to_dict(self):
         return {
             'narrator_id': self.narrator_id,
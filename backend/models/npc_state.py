@@ -1,10 +1,17 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+from backend.models.serialization import SerializationCache
+
 
 @dataclass
-class NPCState:
-    """State for a single NPC agent"""
+class NPCState(SerializationCache):
+    """
+    State for a single NPC agent
+
+    to_dict/to_public_dict are cached until the NPC changes; replace
+    knowledge and relationships instead of mutating them in place.
+    """
 
     npc_id: str
     name: str
@@ -22,6 +29,9 @@ class NPCState:
     last_action: Optional[str] = None
 
     def to_dict(self):
+        return self._cached("private", self._private_dict)
+
+    def _private_dict(self):
         return {
             "npc_id": self.npc_id,
             "name": self.name,
@@ -37,6 +47,10 @@ class NPCState:
             "last_action": self.last_action,
         }
 
+    def remember(self, entry: str, keep: int = 10):
+        """Add a knowledge entry, keeping the `keep` most recent"""
+        self.knowledge = (self.knowledge + [entry])[-keep:]
+
     def can_perceive_event(self, event: dict) -> bool:
         """Can this NPC know about this event?"""
         # same location
@@ -67,6 +81,9 @@ class NPCState:
         self.urgency_level = max(1, min(10, self.urgency_level + delta))
 
     def to_public_dict(self):
+        return self._cached("public", self._public_dict)
+
+    def _public_dict(self):
         # No secrets, no current_goal, and keep knowledge minimal (or omit entirely)
         return {
             "npc_id": self.npc_id,
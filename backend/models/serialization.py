@@ -0,0 +1,26 @@
+from typing import Callable
+
+
+class SerializationCache:
+    """
+    Mixin for state models: serialized forms are cached until the model changes
+
+    Any attribute assignment marks the model dirty and drops its cached
+    dicts. In-place changes (appending to a list field) are not seen, so
+    mutable fields are replaced rather than mutated, or touch() is called.
+    Cached dicts are shared between callers and must not be modified.
+    """
+
+    def __setattr__(self, name: str, value):
+        object.__setattr__(self, name, value)
+        self.__dict__.pop("_serialized", None)
+
+    def touch(self):
+        """Mark the model dirty after an in-place change"""
+        self.__dict__.pop("_serialized", None)
+
+    def _cached(self, kind: str, build: Callable[[], dict]) -> dict:
+        cache = self.__dict__.setdefault("_serialized", {})
+        if kind not in cache:
+            cache[kind] = build()
+        return cache[kind]
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+SONNET = "claude-sonnet-4-5-20250929"
+HAIKU = "claude-haiku-4-5-20251001"
+
+
+@dataclass
+class SessionProfile:
+    """
+    Latency/quality settings for one game session
+
+    Every table is keyed by agent ("gm", "npc", "narrator") and may be
+    overridden for a single call type (e.g. "generate_stimulus"); the call
+    type wins over the agent. Model routing (MODEL_ROUTES) sits in between:
+    call-type model > route > agent model. The defaults are the original
+    hard-coded settings.
+    """
+
+    name: str = "balanced"
+
+    # model per agent / call type
+    models: Dict[str, str] = field(
+        default_factory=lambda: {"gm": SONNET, "narrator": SONNET, "npc": HAIKU}
+    )
+    # output token caps per agent / call type
+    max_tokens: Dict[str, int] = field(
+        default_factory=lambda: {"gm": 2000, "narrator": 1500, "npc": 800}
+    )
+    # request timeouts in seconds per agent / call type (missing = no timeout)
+    timeouts: Dict[str, float] = field(default_factory=dict)
+    # optional stages: narrator_aside, check_scene_status, generate_stimulus
+    stages: Dict[str, bool] = field(default_factory=dict)
+
+    gm_mode: str = "split"  # split | fused
+    # latency budget for a whole moment in seconds (see MomentBudget)
+    moment_budget: float = 60.0
+    # relative share of model slots when sessions compete (see FairQueue)
+    fair_share: float = 1.0
+
+    @classmethod
+    def from_config(cls, name: str, profile: dict) -> "SessionProfile":
+        """Build a profile from a SESSION_PROFILES entry, missing keys keep defaults"""
+        defaults = cls()
+        return cls(
+            name=name,
+            models={**defaults.models, **profile.get("models", {})},
+            max_tokens={**defaults.max_tokens, **profile.get("max_tokens", {})},
+            timeouts=dict(profile.get("timeouts", {})),
+            stages=dict(profile.get("stages", {})),
+            gm_mode=profile.get("gm_mode", defaults.gm_mode),
+            moment_budget=profile.get("moment_budget", defaults.moment_budget),
+            fair_share=profile.get("fair_share", defaults.fair_share),
+        )
+
+    def model_for(self, agent: str, call_type: str) -> str:
+        return self.models.get(call_type, self.models[agent])
+
+    def explicit_model(self, call_type: str) -> Optional[str]:
+        """Model set for this exact call type, if any (wins over model routing)"""
+        return self.models.get(call_type)
+
+    def max_tokens_for(self, agent: str, call_type: str) -> int:
+        return self.max_tokens.get(call_type, self.max_tokens[agent])
+
+    def timeout_for(self, agent: str, call_type: str) -> Optional[float]:
+        return self.timeouts.get(call_type, self.timeouts.get(agent))
+
+    def stage_enabled(self, stage: str) -> bool:
+        return self.stages.get(stage, True)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "models": self.models,
+            "max_tokens": self.max_tokens,
+            "timeouts": self.timeouts,
+            "stages": self.stages,
+            "gm_mode": self.gm_mode,
+            "moment_budget": self.moment_budget,
+            "fair_share": self.fair_share,
+        }
@@ -0,0 +1,219 @@
+# backend/pacing.py
+
+import logging
+from typing import List, Optional, Tuple
+
+from backend.models.game_state import GameState
+from backend.text_similarity import content_words, jaccard
+
+logger = logging.getLogger(__name__)
+
+# scene energies where an ending could be close
+LATE_ENERGIES = {"climactic", "resolving"}
+
+
+class PacingEstimator:
+    """
+    Cheap local stand-in for GMAgent.check_scene_status
+
+    Runs every moment from the tension/energy history, how much the latest
+    event repeats the previous ones, and how close the scene is to
+    max_moments. Hints of a stall or an ending drop its confidence and hand
+    the decision to the LLM check. Only clear-cut cases are claimed outright:
+    the same scene energy with flat tension for `stall_moments` moments is a
+    stall (needs a stimulus), and a scene resolving for two moments running
+    is an ending. So is running out of time (`ending_moments_left` moments
+    before max_moments), reported as "time_limit" like the engine's forced
+    conclusion at max_moments.
+
+    The LLM check also runs at least every `check_every` moments. Whenever it
+    runs, its answer is compared with the local estimate so the skip rate can
+    be weighed against ending accuracy.
+
+    Estimates read the history without changing it: a moment joins the
+    history through record(), which the engine defers to the moment's
+    commit, so a rolled back moment leaves no trace.
+    """
+
+    def __init__(
+        self,
+        check_every: int = 4,
+        confidence_threshold: float = 0.7,
+        stall_moments: int = 3,
+        ending_moments_left: int = 0,
+    ):
+        self.check_every = check_every
+        self.confidence_threshold = confidence_threshold
+        self.stall_moments = stall_moments
+        self.ending_moments_left = ending_moments_left
+
+        self.tension_history: List[int] = []
+        self.energy_history: List[str] = []
+        self.moments_since_check = 0
+
+        # decision log counters
+        self.stats = {
+            "moments": 0,
+            "llm_checks": 0,
+            "skipped_checks": 0,
+            "agreements": 0,
+            "disagreements": 0,
+            "missed_endings": 0,  # local said "not ending", LLM said ending
+        }
+
+    def estimate(self, game_state: GameState) -> dict:
+        """
+        Estimate the scene status locally, the history plus this moment
+
+        Returns:
+            dict: check_scene_status fields plus
+                'confidence': float (0-1),
+                'source': 'local'
+        """
+        tensions = self.tension_history + [game_state.tension_level]
+        energies = self.energy_history + [game_state.scene_energy]
+
+        trend = self._tension_trend(tensions)
+        repetition = self._repetition(game_state)
+        progress = game_state.moment_count / max(1, game_state.max_moments)
+
+        confidence = 1.0
+        if len(tensions) < 2:
+            confidence -= 0.5  # not enough history yet
+        if progress >= 0.7:
+            confidence -= 0.5  # near the time limit, endings get likely
+        if game_state.tension_level >= 8:
+            confidence -= 0.4  # violence or a breakdown could end it
+        if game_state.scene_energy in LATE_ENERGIES:
+            confidence -= 0.4
+        if repetition >= 0.5:
+            confidence -= 0.4  # same beats again, possibly stalled
+        if trend < -0.5:
+            confidence -= 0.2  # de-escalating, could be resolving
+
+        stalled = self._stalled(tensions, energies)
+        if stalled:
+            energy_assessment = "stalled"
+        elif trend > 0.5:
+            energy_assessment = "rising"
+        elif trend < -0.5:
+            energy_assessment = "falling"
+        else:
+            energy_assessment = "plateau"
+
+        ending_type = None
+        if self._energy_run(energies, "resolving") >= 2:
+            ending_type = "resolution"
+        elif (
+            game_state.max_moments - game_state.moment_count
+            <= self.ending_moments_left
+        ):
+            ending_type = "time_limit"  # same reason as the forced conclusion
+
+        return {
+            "energy_assessment": energy_assessment,
+            "needs_stimulus": stalled,
+            "stimulus_suggestion": "",
+            "approaching_ending": ending_type is not None,
+            "ending_type": ending_type,
+            "confidence": round(max(0.0, confidence), 2),
+            "source": "local",
+        }
+
+    def needs_llm_check(self, estimate: dict) -> bool:
+        """Decide whether the LLM check has to run this moment"""
+        if self.moments_since_check + 1 >= self.check_every:
+            reason = f"periodic check ({self.check_every} moments)"
+        elif estimate["confidence"] < self.confidence_threshold:
+            reason = f"unsure (confidence {estimate['confidence']})"
+        else:
+            self.stats["skipped_checks"] += 1
+            logger.info(
+                f"Pacing: skipped scene check "
+                f"(confidence {estimate['confidence']}, {estimate['energy_assessment']}) "
+                f"stats: {self.stats}"
+            )
+            return False
+
+        logger.info(f"Pacing: running scene check, {reason}")
+        return True
+
+    def record_llm_check(self, estimate: dict, scene_status: dict):
+        """Compare the local estimate with the LLM's answer"""
+        self.stats["llm_checks"] += 1
+
+        agreed = (
+            estimate["approaching_ending"] == bool(scene_status.get("approaching_ending"))
+            and estimate["needs_stimulus"] == bool(scene_status.get("needs_stimulus"))
+        )
+        if agreed:
+            self.stats["agreements"] += 1
+        else:
+            self.stats["disagreements"] += 1
+            if scene_status.get("approaching_ending"):
+                self.stats["missed_endings"] += 1
+
+        logger.info(
+            f"Pacing: local {estimate['energy_assessment']} "
+            f"(confidence {estimate['confidence']}) vs LLM "
+            f"{scene_status.get('energy_assessment')}, "
+            f"ending: {scene_status.get('approaching_ending')} stats: {self.stats}"
+        )
+
+    def record(self, tension: int, energy: str, checked: bool):
+        """Add a committed moment to the history (checked: the LLM check ran)"""
+        self.tension_history.append(tension)
+        self.energy_history.append(energy)
+        self.moments_since_check = 0 if checked else self.moments_since_check + 1
+        self.stats["moments"] += 1
+
+    def checkpoint(self) -> Tuple[int, int]:
+        """The history only ever grows: its length marks a snapshot"""
+        return len(self.tension_history), self.moments_since_check
+
+    def restore(
+        self, checkpoint: Tuple[int, int], source: Optional["PacingEstimator"] = None
+    ):
+        """Go back to a checkpoint of this estimator's history, or of `source`'s"""
+        source = source or self
+        length, self.moments_since_check = checkpoint
+        self.tension_history = source.tension_history[:length]
+        self.energy_history = source.energy_history[:length]
+
+    @staticmethod
+    def _tension_trend(tensions: List[int]) -> float:
+        """Average tension change per moment over the last few moments"""
+        recent = tensions[-4:]
+        if len(recent) < 2:
+            return 0.0
+        return (recent[-1] - recent[0]) / (len(recent) - 1)
+
+    @staticmethod
+    def _energy_run(energies: List[str], energy: str) -> int:
+        """How many of the latest moments in a row had this scene energy"""
+        run = 0
+        for recorded in reversed(energies):
+            if recorded != energy:
+                break
+            run += 1
+        return run
+
+    def _stalled(self, tensions: List[int], energies: List[str]) -> bool:
+        """Same (non-late) scene energy and flat tension for stall_moments"""
+        energy = energies[-1]
+        if (
+            energy in LATE_ENERGIES
+            or self._energy_run(energies, energy) < self.stall_moments
+        ):
+            return False
+        recent = tensions[-self.stall_moments :]
+        return max(recent) - min(recent) <= 1
+
+    def _repetition(self, game_state: GameState) -> float:
+        """How much the latest event repeats the ones just before it"""
+        events = game_state.event_log[-4:]
+        if len(events) < 2:
+            return 0.0
+
+        latest = content_words(events[-1].description)
+        return max(jaccard(latest, content_words(e.description)) for e in events[:-1])
@@ -0,0 +1,256 @@
+# backend/pools/opening_pool.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from backend.models.game_state import GameState
+from backend.models.narrator_state import NarratorState
+
+from backend.agents.gm_agent import GMAgent
+from backend.agents.narrator_agent import NarratorAgent
+from backend.llm.scheduling import current_priority
+from backend.tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+
+class OpeningScenePool:
+    """
+    Background pool of ready-made opening scenes
+
+    Generating an opening costs two Sonnet calls (GM opening + narrator intro)
+    before the player sees anything. The pool keeps `depth` finished openings
+    per scenario so start_game can hand one out immediately and apply the NPC
+    briefings locally.
+
+    - Refills itself in the background whenever an entry is taken
+    - Entries older than `ttl_seconds` are thrown away
+    - Entries are persisted to `path` so a restart does not empty the pool
+    - Entries generated for an older version of a scenario are discarded
+    """
+
+    def __init__(
+        self,
+        scenarios: List[dict],
+        narrator_config: dict,
+        depth: int = 2,
+        ttl_seconds: float = 6 * 60 * 60,
+        path: Optional[str] = None,
+        retry_delay: float = 30.0,
+    ):
+        self.scenarios = {scenario["name"]: scenario for scenario in scenarios}
+        self.narrator_config = narrator_config
+        self.depth = depth
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.retry_delay = retry_delay
+
+        self._entries: Dict[str, Deque[dict]] = {
+            name: deque() for name in self.scenarios
+        }
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self._load()
+
+    # =========================================================================
+    # LIFECYCLE
+    # =========================================================================
+
+    def start(self):
+        """Start the background refill loop (must be called inside the event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop())
+            logger.info(f"Opening pool started (depth: {self.depth})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._save()
+
+    # =========================================================================
+    # POOL ACCESS
+    # =========================================================================
+
+    def take(self, scenario_name: str) -> Optional[dict]:
+        """
+        Pop a fresh pre-generated opening for a scenario
+
+        Returns:
+            dict or None: {
+                'scenario_name': str,
+                'fingerprint': str,
+                'created_at': float (unix time),
+                'opening': dict (generate_opening_scene output),
+                'narrator_output': dict (narrate_moment output for the intro)
+            }
+            None if the pool is empty, the caller should generate live
+        """
+        entries = self._entries.get(scenario_name)
+        if entries is None:
+            return None
+
+        self._evict_expired(scenario_name)
+
+        entry = entries.popleft() if entries else None
+        if entry:
+            logger.info(
+                f"Opening pool hit for '{scenario_name}' ({len(entries)} left)"
+            )
+            self._save()
+        else:
+            logger.info(f"Opening pool miss for '{scenario_name}'")
+
+        self._wakeup.set()
+        return entry
+
+    def size(self, scenario_name: str) -> int:
+        return len(self._entries.get(scenario_name, ()))
+
+    # =========================================================================
+    # REFILL
+    # =========================================================================
+
+    async def _refill_loop(self):
+        # prewarming must never hold up a player's calls
+        current_priority.set("background")
+
+        while True:
+            self._wakeup.clear()
+
+            for scenario_name in self.scenarios:
+                self._evict_expired(scenario_name)
+
+                while len(self._entries[scenario_name]) < self.depth:
+                    try:
+                        with TRACER.span(
+                            "refill_opening_pool", scenario=scenario_name
+                        ):
+                            entry = await self._generate_entry(scenario_name)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Opening pool refill failed: {e}")
+                        await asyncio.sleep(self.retry_delay)
+                        continue
+
+                    self._entries[scenario_name].append(entry)
+                    self._save()
+                    logger.info(
+                        f"Opening pool refilled '{scenario_name}' "
+                        f"({len(self._entries[scenario_name])}/{self.depth})"
+                    )
+
+            # sleep until something is taken, or until the oldest entry expires
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self._next_expiry_delay()
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _generate_entry(self, scenario_name: str) -> dict:
+        """Run the same opening pipeline as a live start_game, on a throwaway state"""
+        scenario = self.scenarios[scenario_name]
+        state = GameState.from_scenario(scenario)
+        narrator_agent = NarratorAgent(NarratorState.from_config(self.narrator_config))
+
+        opening = await GMAgent().generate_opening_scene(state)
+        state.tension_level = opening.get("initial_tension_level", state.tension_level)
+        state.scene_energy = opening.get("initial_scene_energy", state.scene_energy)
+
+        narrator_output = await narrator_agent.narrate_moment(
+            {
+                "what_happens": opening.get("player_intro", ""),
+                "tension": state.tension_level,
+                "energy": state.scene_energy,
+            },
+            [],
+            state,
+        )
+
+        return {
+            "scenario_name": scenario_name,
+            "fingerprint": self._fingerprint(scenario),
+            "created_at": time.time(),
+            "opening": opening,
+            "narrator_output": narrator_output,
+        }
+
+    def _evict_expired(self, scenario_name: str):
+        entries = self._entries[scenario_name]
+        cutoff = time.time() - self.ttl_seconds
+        while entries and entries[0]["created_at"] < cutoff:
+            entries.popleft()
+            logger.info(f"Opening pool entry for '{scenario_name}' expired")
+
+    def _next_expiry_delay(self) -> float:
+        oldest = [
+            entries[0]["created_at"] for entries in self._entries.values() if entries
+        ]
+        if not oldest:
+            return self.ttl_seconds
+        return max(1.0, min(oldest) + self.ttl_seconds - time.time())
+
+    def _fingerprint(self, scenario: dict) -> str:
+        """Hash of the configs an entry was generated from"""
+        raw = json.dumps([scenario, self.narrator_config], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not load opening pool from {self.path}: {e}")
+            return
+
+        cutoff = time.time() - self.ttl_seconds
+        for scenario_name, entries in stored.items():
+            scenario = self.scenarios.get(scenario_name)
+            if scenario is None:
+                continue
+
+            fingerprint = self._fingerprint(scenario)
+            for entry in entries:
+                if entry.get("fingerprint") == fingerprint and entry.get(
+                    "created_at", 0
+                ) >= cutoff:
+                    self._entries[scenario_name].append(entry)
+
+        logger.info(
+            f"Opening pool loaded {sum(len(e) for e in self._entries.values())} entries"
+        )
+
+    def _save(self):
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({k: list(v) for k, v in self._entries.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save opening pool to {self.path}: {e}")
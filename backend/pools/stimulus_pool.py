@@ -0,0 +1,132 @@
+# backend/pools/stimulus_pool.py
+
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from backend.models.game_state import GameState
+from backend.agents.gm_agent import GMAgent
+from backend.text_similarity import content_words, jaccard
+from backend.llm.scheduling import current_priority
+from backend.tracing import TRACER, current_span
+
+logger = logging.getLogger(__name__)
+
+# scene energies a stall can follow from; only these are worth a refill
+REFILL_ENERGIES = {"plateau", "stalled"}
+
+
+class StimulusPool:
+    """
+    Per-session pool of ready external stimuli
+
+    generate_stimulus used to run on the critical path right after
+    check_scene_status reported a stall. The pool generates stimuli between
+    moments instead, so a stalled scene gets one instantly. It only does so
+    while the scene plateaus: a scene that keeps moving never needs one.
+
+    Every stimulus remembers the scene context it was generated for. When the
+    recent events drift too far from that context (word overlap below
+    `drift_threshold`), the stimulus is discarded and regenerated.
+    """
+
+    def __init__(
+        self, gm_agent: GMAgent, depth: int = 1, drift_threshold: float = 0.25
+    ):
+        self.gm_agent = gm_agent
+        self.depth = depth
+        self.drift_threshold = drift_threshold
+
+        self._entries: List[Tuple[str, Set[str]]] = []  # (stimulus, context)
+        self._task: Optional[asyncio.Task] = None
+
+    def take(self, game_state: GameState) -> Optional[str]:
+        """
+        Pop a ready stimulus that still fits the scene
+
+        Returns None if nothing fits, the caller should generate live
+        """
+        self._evict_drifted(self.context_signature(game_state))
+
+        if not self._entries:
+            logger.info("Stimulus pool miss")
+            return None
+
+        stimulus, _ = self._entries.pop(0)
+        logger.info(f"Stimulus pool hit ({len(self._entries)} left)")
+        return stimulus
+
+    def schedule_refill(
+        self, game_state: GameState, energy_assessment: Optional[str]
+    ):
+        """
+        Top the pool up in the background (call between moments)
+
+        `energy_assessment` is the latest moment's pacing estimate (or scene
+        check); anything but a plateau or stall leaves the pool as it is.
+        """
+        if energy_assessment not in REFILL_ENERGIES:
+            return
+
+        context = self.context_signature(game_state)
+        self._evict_drifted(context)
+
+        if len(self._entries) >= self.depth:
+            return
+        if self._task and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._refill(game_state, context))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def clear(self):
+        """Stop any refill and drop every stimulus (the scene went elsewhere)"""
+        await self.stop()
+        self._entries = []
+
+    async def _refill(self, game_state: GameState, context: Set[str]):
+        current_priority.set("background")
+        # its own trace, not a late child of the moment that scheduled it
+        current_span.set(None)
+
+        while len(self._entries) < self.depth:
+            try:
+                with TRACER.span("refill_stimulus_pool"):
+                    stimulus = await self.gm_agent.generate_stimulus(game_state)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stimulus pool refill failed: {e}")
+                return
+
+            self._entries.append((stimulus, context))
+            logger.info(f"Stimulus pool refilled ({len(self._entries)}/{self.depth})")
+
+    def _evict_drifted(self, context: Set[str]):
+        kept = [
+            (stimulus, generated_for)
+            for stimulus, generated_for in self._entries
+            if jaccard(generated_for, context) >= self.drift_threshold
+        ]
+        if len(kept) < len(self._entries):
+            logger.info(
+                f"Stimulus pool dropped {len(self._entries) - len(kept)} drifted entries"
+            )
+        self._entries = kept
+
+    @staticmethod
+    def context_signature(game_state: GameState) -> Set[str]:
+        """Bag of content words describing where the scene is right now"""
+        text = f"{game_state.player_location} {game_state.get_recent_narrative(3)}"
+        words = content_words(text)
+        words.add(f"energy:{game_state.scene_energy}")
+        words.add(f"tension:{game_state.tension_level // 4}")  # low/mid/high band
+        return words
@@ -0,0 +1,104 @@
+# backend/server_timing.py
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+class ServerTiming:
+    """Durations collected while handling one request (Server-Timing header)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (name, seconds, description)
+        self.entries: List[Tuple[str, float, Optional[str]]] = []
+
+    def add(self, name: str, seconds: float, description: Optional[str] = None):
+        self.entries.append((name, seconds, description))
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self, total: Optional[float] = None) -> str:
+        """Header value: every entry in order, then `total` (milliseconds)"""
+        metrics = [
+            _metric(name, seconds, description)
+            for name, seconds, description in self.entries
+        ]
+        metrics.append(_metric("total", self.total() if total is None else total))
+        return ", ".join(metrics)
+
+
+def _metric(name: str, seconds: float, description: Optional[str] = None) -> str:
+    # metric names are HTTP tokens; stage labels like "respond_to_moment:npc" aren't
+    metric = f"{re.sub(r'[^A-Za-z0-9_.-]', '.', name)};dur={seconds * 1000:.1f}"
+    if description:
+        metric += f';desc="{description}"'
+    return metric
+
+
+# timings of the request being handled (set by ServerTimingMiddleware)
+current_timing: ContextVar[Optional[ServerTiming]] = ContextVar(
+    "current_timing", default=None
+)
+
+
+def record_timing(name: str, seconds: float, description: Optional[str] = None):
+    """Add a duration to the current request's Server-Timing, if it has one"""
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(name, seconds, description)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record how long the block takes in the current request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header to selected routes
+
+    Stages report their durations with record_timing() while the request
+    runs; the header lists them in order, followed by the total server
+    time. `on_response(path, status, seconds)` is told the total of every
+    timed response (the latency breakdown matches it with client reports).
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str],
+        on_response: Optional[Callable[[str, int, float], None]] = None,
+    ):
+        self.app = app
+        self.paths = set(paths)
+        self.on_response = on_response
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        current_timing.set(timing)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = timing.total()
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.header(total).encode("latin-1")),
+                ]
+                if self.on_response:
+                    self.on_response(scope["path"], message["status"], total)
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
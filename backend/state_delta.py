@@ -0,0 +1,100 @@
+# backend/state_delta.py
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """
+    JSON-patch (RFC 6902) operations turning `old` into `new`
+
+    Dicts are compared key by key. Lists are treated as sliding windows
+    (recent events, NPC knowledge): entries dropped from the front and
+    appended at the back become removes and adds, anything else replaces
+    the list whole. Scalars that differ are replaced.
+    """
+    # cached serializations (unchanged NPCs, events) are the same object
+    if old is new or old == new:
+        return []
+    if isinstance(old, list) and isinstance(new, list):
+        return _window_patch(old, new, path)
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    ops = []
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+    for key, value in new.items():
+        child = f"{path}/{_escape(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": child, "value": value})
+        else:
+            ops.extend(json_patch(old[key], value, child))
+    return ops
+
+
+def _window_patch(old: list, new: list, path: str) -> List[dict]:
+    # keep at least one entry, otherwise a plain replace is shorter
+    for dropped in range(len(old) if old else 1):
+        kept = len(old) - dropped
+        if old[dropped:] == new[:kept]:
+            return [{"op": "remove", "path": f"{path}/0"}] * dropped + [
+                {"op": "add", "path": f"{path}/-", "value": value}
+                for value in new[kept:]
+            ]
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _escape(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+class StateVersions:
+    """
+    Version counter and recently served states of one game session
+
+    Every change to the session's state bumps the version. Each state
+    sent to the client is kept (per view, a handful of versions back) so
+    the next response can be a patch against the version the client says
+    it has. A client with an unknown or no version gets a full snapshot.
+    """
+
+    def __init__(self, keep: int = 8):
+        self.keep = keep
+        self.version = 0
+        self._served: Dict[str, "OrderedDict[int, dict]"] = {}
+        self.stats = {"full": 0, "delta": 0}
+
+    def bump(self) -> int:
+        self.version += 1
+        return self.version
+
+    def encode(
+        self, view: str, state: dict, known_version: Optional[int] = None
+    ) -> dict:
+        """
+        Response fields for `state` at the current version
+
+        Returns:
+            dict: {"state_version", "state"} for a full snapshot, or
+                {"state_version", "state_base_version", "state_patch"}
+        """
+        served = self._served.setdefault(view, OrderedDict())
+        base = served.get(known_version) if known_version is not None else None
+
+        served[self.version] = state
+        served.move_to_end(self.version)
+        while len(served) > self.keep:
+            served.popitem(last=False)
+
+        if base is None:
+            self.stats["full"] += 1
+            return {"state_version": self.version, "state": state}
+
+        self.stats["delta"] += 1
+        return {
+            "state_version": self.version,
+            "state_base_version": known_version,
+            "state_patch": json_patch(base, state),
+        }
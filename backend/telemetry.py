@@ -0,0 +1,99 @@
+# backend/telemetry.py
+
+import math
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from backend.metrics import PLAYER_LATENCY_SECONDS
+
+# what the player waited, in the order it happens
+PARTS = ("server", "network", "render", "total")
+
+
+class LatencyBreakdown:
+    """
+    Splits the latency players feel into server, network and client render
+
+    The server records its own total for each game request (by request id)
+    as the response goes out. The browser later reports, for the same
+    request id, how long it waited for the response and until the first
+    word appeared on screen. Matched up:
+
+        server  = time the server spent on the request (admission included)
+        network = time to response - server (transfer, proxies, TLS)
+        render  = first rendered word - time to response (parsing, UI)
+        total   = first rendered word
+
+    Server totals nobody reports on are forgotten after `pending` requests.
+    """
+
+    def __init__(self, pending: int = 1000, recent: int = 500):
+        self._server: "OrderedDict[str, tuple]" = OrderedDict()
+        self.pending = pending
+        # recent breakdowns per endpoint, seconds
+        self._recent: Dict[str, Deque[Dict[str, float]]] = {}
+        self.recent = recent
+        self.stats = {"reports": 0, "unmatched": 0}
+
+    def record_server(self, request_id: Optional[str], endpoint: str, seconds: float):
+        if not request_id:
+            return
+        self._server[request_id] = (endpoint, seconds)
+        self._server.move_to_end(request_id)
+        while len(self._server) > self.pending:
+            self._server.popitem(last=False)
+
+    def report(self, request_id: str, response_ms: float, first_word_ms: float) -> bool:
+        """
+        Add a client report; False if its request is unknown (or forgotten)
+
+        Args:
+            request_id: X-Request-ID of the timed request
+            response_ms: Request sent to response headers received
+            first_word_ms: Request sent to the first word rendered
+        """
+        matched = self._server.pop(request_id, None)
+        if matched is None:
+            self.stats["unmatched"] += 1
+            return False
+
+        endpoint, server = matched
+        response, first_word = response_ms / 1000, first_word_ms / 1000
+        breakdown = {
+            "server": server,
+            # clocks differ in resolution; never report negative time
+            "network": max(0.0, response - server),
+            "render": max(0.0, first_word - response),
+            "total": first_word,
+        }
+        for part, seconds in breakdown.items():
+            PLAYER_LATENCY_SECONDS.observe(seconds, endpoint=endpoint, part=part)
+
+        self._recent.setdefault(endpoint, deque(maxlen=self.recent)).append(breakdown)
+        self.stats["reports"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        """p50/p95 milliseconds per endpoint and part over the recent reports"""
+        return {
+            **self.stats,
+            "endpoints": {
+                endpoint: {
+                    "samples": len(recent),
+                    **{
+                        part: {
+                            "p50_ms": _percentile([r[part] for r in recent], 0.5),
+                            "p95_ms": _percentile([r[part] for r in recent], 0.95),
+                        }
+                        for part in PARTS
+                    },
+                }
+                for endpoint, recent in self._recent.items()
+            },
+        }
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+    return round(ordered[max(0, index)] * 1000, 1)
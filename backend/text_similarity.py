@@ -0,0 +1,27 @@
+# backend/text_similarity.py
+
+import re
+from typing import Set
+
+# words too common to say anything about the scene
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "but", "to", "of", "in", "on", "at", "for",
+    "with", "his", "her", "their", "he", "she", "they", "it", "is", "are",
+    "was", "were", "as", "by", "from", "that", "this", "into", "up", "out",
+}
+
+
+def content_words(text: str) -> Set[str]:
+    """Lowercased bag of content words in a piece of text"""
+    return {
+        word
+        for word in re.findall(r"[a-z']+", text.lower())
+        if len(word) > 2 and word not in STOPWORDS
+    }
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Overlap of two word bags, 0 (nothing shared) to 1 (identical)"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
@@ -0,0 +1,225 @@
+# backend/tracing.py
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed operation of a trace, with its tags"""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "sampled",
+        "timestamp",
+        "duration",
+        "tags",
+        "_start",
+    )
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool
+    ):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.timestamp = time.time_ns() // 1000  # epoch microseconds
+        self.duration: Optional[int] = None
+        self.tags: dict = {}
+        self._start = time.perf_counter()
+
+    def set(self, **tags):
+        self.tags.update(tags)
+
+    def add(self, tag: str, amount: float = 1):
+        """Add to a counting tag (tokens, retries), starting from 0"""
+        self.tags[tag] = self.tags.get(tag, 0) + amount
+
+    def finish(self):
+        self.duration = max(1, round((time.perf_counter() - self._start) * 1e6))
+
+    def to_zipkin(self, service_name: str) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration": self.duration,
+            "localEndpoint": {"serviceName": service_name},
+            "tags": {
+                tag: str(value) for tag, value in self.tags.items() if value is not None
+            },
+        }
+        if self.parent_id:
+            span["parentId"] = self.parent_id
+        return span
+
+
+# innermost open span of the running task (child tasks inherit it)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class ZipkinExporter:
+    """
+    Writes finished spans as Zipkin v2 JSON from a background thread
+
+    Spans go to a JSON-lines file (one span per line), to a Zipkin-compatible
+    collector (POSTed in batches), or both. A full queue drops spans rather
+    than slowing the request that finished them. The file is rotated once
+    it reaches `max_bytes` (path.1 is the newest old file), keeping at most
+    `backups` of them.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        path: Optional[str] = None,
+        collector_url: Optional[str] = None,
+        queue_size: int = 10000,
+        batch_size: int = 100,
+        max_bytes: Optional[int] = None,
+        backups: int = 1,
+    ):
+        self.service_name = service_name
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.collector_url = collector_url
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is None:
+            if self.path and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._run, name="zipkin-exporter", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Flush what is queued and stop the writer"""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            spans = [span.to_zipkin(self.service_name) for span in batch if span]
+            if spans:
+                self._write(spans)
+            if batch[-1] is None:
+                return
+
+    def _write(self, spans: List[dict]):
+        try:
+            if self.path:
+                self._rotate()
+                with open(self.path, "a") as f:
+                    f.writelines(json.dumps(span) + "\n" for span in spans)
+            if self.collector_url:
+                request = urllib.request.Request(
+                    self.collector_url,
+                    data=json.dumps(spans).encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            self.dropped += len(spans)
+            logger.warning(f"Trace export failed ({e.__class__.__name__}: {e})")
+
+    def _rotate(self):
+        """Move a full file aside (path -> path.1 -> path.2 ...), dropping the oldest"""
+        if not self.max_bytes:
+            return
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+
+        if self.backups < 1:
+            os.remove(self.path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class Tracer:
+    """
+    Opens spans and hands the finished ones to the exporter
+
+    A span opened while another is current becomes its child; otherwise it
+    starts a new trace, sampled with probability `sample_rate` (children
+    follow their root's decision). Without an exporter spans are still
+    timed, but go nowhere.
+    """
+
+    def __init__(
+        self, sample_rate: float = 1.0, exporter: Optional[ZipkinExporter] = None
+    ):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **tags) -> Iterator[Span]:
+        parent = current_span.get()
+        if parent is None:
+            span = Span(
+                name, uuid.uuid4().hex, None, random.random() < self.sample_rate
+            )
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, parent.sampled)
+        span.set(**tags)
+
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            # cancellations included: an abandoned stage shows up as such
+            span.set(error=e.__class__.__name__)
+            raise
+        finally:
+            current_span.reset(token)
+            span.finish()
+            if span.sampled and self.exporter:
+                self.exporter.export(span)
+
+
+# process-wide tracer; main.py attaches the exporter configured in TRACING
+TRACER = Tracer()
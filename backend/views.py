@@ -0,0 +1,71 @@
+# backend/views.py
+
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Optional
+
+# state fields that travel with "state" (see StateVersions.encode)
+STATE_FIELDS = ("state", "state_version", "state_base_version", "state_patch")
+
+
+@dataclass(frozen=True)
+class View:
+    """
+    What one kind of client gets to see in /api/start and /api/play
+
+    The engine asks the view before doing work whose only consumer is a
+    response field (the debug block, the narrator's noticed/missed lists),
+    and project() drops whatever the view hides from the finished response.
+    """
+
+    name: str
+    # top-level response fields left out
+    hidden: FrozenSet[str] = frozenset()
+    # NPC secrets, goals and knowledge in `state` (to_dict vs to_public_dict)
+    private_state: bool = False
+    # the NPCs' internal_thought in npc_responses
+    npc_thoughts: bool = False
+
+    @property
+    def state_kind(self) -> str:
+        """Key the served states are versioned under (see StateVersions)"""
+        return "private" if self.private_state else "public"
+
+    def shows(self, field: str, fields: Optional[Iterable[str]] = None) -> bool:
+        """Is `field` part of the response (view and requested field set)"""
+        if field in self.hidden:
+            return False
+        return fields is None or field in fields
+
+
+VIEWS = {
+    # what the player may know
+    "player": View(
+        "player", hidden=frozenset({"debug", "scene_status", "narrator_reliability"})
+    ),
+    # someone watching the game: pacing too, still no secrets
+    "spectator": View("spectator", hidden=frozenset({"debug"})),
+    # everything, the GM's objective truth and NPC secrets included
+    "debug": View("debug", private_state=True, npc_thoughts=True),
+}
+DEFAULT_VIEW = "player"
+
+
+def project(result: dict, view: View, fields: Optional[Iterable[str]] = None) -> dict:
+    """
+    `result` with only what `view` shows (and `fields` asks for, if given)
+
+    Errors and the state's version fields go along with whatever is kept.
+    """
+    projected = {
+        key: value
+        for key, value in result.items()
+        if key == "error"
+        or view.shows("state" if key in STATE_FIELDS else key, fields)
+    }
+
+    if not view.npc_thoughts and projected.get("npc_responses"):
+        projected["npc_responses"] = [
+            {k: v for k, v in response.items() if k != "internal_thought"}
+            for response in projected["npc_responses"]
+        ]
+    return projected
@@ -40,3 +40,271 @@ NARRATOR = {
     "misbeliefs": ["Everyone is hiding something"],
     "starting_reliability": 7
 }
+
+# Pre-generated opening scenes (backend/pools/opening_pool.py)
+# start_game takes a ready opening from this pool instead of making two
+# Sonnet calls before the player sees anything.
+OPENING_POOL = {
+    "enabled": True,
+    "depth": 2,  # ready openings kept per scenario
+    "ttl_seconds": 6 * 60 * 60,  # openings older than this are discarded
+    "path": "data/opening_pool.json",  # persisted across restarts
+}
+
+# Per-session pool of ready external stimuli (backend/pools/stimulus_pool.py)
+# Stimuli are generated between moments once the scene plateaus, and
+# regenerated when the recent events drift away from the context they were
+# written for.
+STIMULUS_POOL = {
+    "enabled": True,
+    "depth": 1,  # each refill is a Sonnet call, keep this small
+    "drift_threshold": 0.25,  # min word overlap with the current scene context
+}
+
+# Adaptive scheduling of the GM scene check (backend/pacing.py)
+# A local estimator runs every moment; the Sonnet check only runs when the
+# estimate is unsure or every `check_every` moments.
+# stall_moments: same scene energy with flat tension this long is a stall
+# ending_moments_left: moments before max_moments the estimate calls a
+# "time_limit" ending (0: at max_moments, like the forced conclusion)
+PACING = {
+    "enabled": True,
+    "check_every": 4,
+    "confidence_threshold": 0.7,
+    "stall_moments": 3,
+    "ending_moments_left": 0,
+}
+
+# Local gate in front of the narrator aside LLM call (NarratorAgent)
+NARRATOR_ASIDE = {
+    "min_tension": 7,
+    "cooldown_moments": 2,  # moments to wait after an aside
+    "budget": 6,  # asides per session, None for unlimited
+    "concurrent": True,  # run the aside alongside narration instead of after
+}
+
+# Single-call ensemble NPC responses for small casts (NPCEnsembleAgent)
+# Casts outside [min_cast, max_cast] use one call per NPC.
+NPC_ENSEMBLE = {
+    "enabled": True,
+    "min_cast": 2,
+    "max_cast": 4,
+}
+
+# Named latency/quality session profiles (backend/models/session_profile.py)
+# Chosen per session at /api/start. Tables are keyed by agent ("gm", "npc",
+# "narrator") and can be overridden per call type ("generate_stimulus", ...).
+# Anything left out keeps the balanced defaults.
+SESSION_PROFILES = {
+    "fast": {
+        "models": {
+            "gm": "claude-haiku-4-5-20251001",
+            "narrator": "claude-haiku-4-5-20251001",
+            "npc": "claude-haiku-4-5-20251001",
+        },
+        "max_tokens": {"gm": 1000, "narrator": 700, "npc": 400},
+        "timeouts": {"gm": 15, "narrator": 12, "npc": 8},
+        "stages": {"narrator_aside": False},
+        "gm_mode": "fused",
+        "moment_budget": 25,
+    },
+    "balanced": {
+        "models": {
+            "gm": "claude-sonnet-4-5-20250929",
+            "narrator": "claude-sonnet-4-5-20250929",
+            "npc": "claude-haiku-4-5-20251001",
+        },
+        "max_tokens": {"gm": 2000, "narrator": 1500, "npc": 800},
+        "timeouts": {"gm": 30, "narrator": 30, "npc": 15},
+        "gm_mode": "split",
+        "moment_budget": 60,
+    },
+    "rich": {
+        "models": {
+            "gm": "claude-sonnet-4-5-20250929",
+            "narrator": "claude-sonnet-4-5-20250929",
+            "npc": "claude-sonnet-4-5-20250929",
+        },
+        "max_tokens": {"gm": 3000, "narrator": 2000, "npc": 1200},
+        "timeouts": {"gm": 60, "narrator": 60, "npc": 30},
+        "gm_mode": "split",
+        "moment_budget": 120,
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# Share of a profile's moment_budget held back for each later critical stage
+# (backend/deadline.py). Interpretation must be done before the NPCs',
+# synthesis' and narration's shares are all that is left, and so on; a stage
+# that overruns is replaced by its fallback instead of stalling the moment.
+MOMENT_BUDGET_RESERVES = {
+    "respond_to_moment": 0.2,
+    "synthesize_narrative": 0.25,
+    "narrate_moment": 0.25,
+}
+
+# Active game sessions kept in memory, the least recently used is dropped
+MAX_SESSIONS = 200
+
+# Model routing per agent call type (backend/llm/router.py)
+# A route lists tiers cheapest first; later tiers are only tried when the
+# answer fails schema validation or a low-confidence check (a cascade).
+# Call types without a route use the session profile's model. Tune this
+# table from the per-route stats at /api/routing.
+MODEL_TIERS = {
+    "small": "claude-haiku-4-5-20251001",
+    "large": "claude-sonnet-4-5-20250929",
+}
+MODEL_ROUTES = {
+    # one sentence of output, Haiku writes it at a fraction of the latency
+    "generate_stimulus": {"tiers": ["small", "large"]},
+    # yes/no plus one or two sentences
+    "narrator_aside": {"tiers": ["small", "large"]},
+    # classification over a short context
+    "check_scene_status": {"tiers": ["small", "large"]},
+    "check_initiative": {"tiers": ["small"]},
+}
+
+# Hedged requests on the critical path (backend/llm/hedging.py)
+# A call still running at the `percentile` of its recent latency gets a
+# duplicate request; the first answer wins. `budget` caps hedges at that
+# fraction of calls. Stats at /api/hedging.
+HEDGING = {
+    "enabled": True,
+    "call_types": [
+        "interpret_moment",
+        "respond_to_moment",
+        "ensemble_respond",
+        "synthesize_narrative",
+        "synthesize_and_check_scene",
+        "narrate_moment",
+    ],
+    "percentile": 0.9,
+    "min_samples": 20,  # no hedging until the latency percentile means something
+    "budget": 0.1,
+}
+
+# Adaptive (AIMD) concurrency limit per model (backend/llm/concurrency.py)
+# In-flight requests per model grow by one while answers are healthy and are
+# cut by decrease_factor on 429/529 or answers latency_tolerance x slower
+# than usual. Overloaded requests are retried with jittered backoff that
+# honours Retry-After. Stats at /api/concurrency.
+CONCURRENCY = {
+    "initial": 8,
+    "min": 1,
+    "max": 64,
+    "decrease_factor": 0.5,
+    "latency_tolerance": 2.5,
+    "max_retries": 3,
+    "backoff_base": 1.0,  # seconds, doubled per retry
+    "backoff_max": 20.0,
+}
+
+# API key pool (backend/llm/key_pool.py)
+# Keys come from ANTHROPIC_API_KEYS (comma separated) and ANTHROPIC_API_KEY.
+# Calls go to the key with the most rate-limit headroom; a key is taken out
+# of rotation after max_rate_limits 429s in a row (for cooldown seconds) or
+# an authentication error (for auth_cooldown seconds). Usage at /api/keys.
+KEY_POOL = {
+    "max_rate_limits": 3,
+    "cooldown": 60,
+    "auth_cooldown": 600,
+}
+
+# Priority classes and per-session fair queuing (backend/llm/scheduling.py)
+# When a model's concurrency slots are full, waiting calls are served
+# interactive > optional > background, and sessions inside a class share
+# slots in proportion to their profile's fair_share. Call types not listed
+# are interactive; pool refills run as background. `shares` caps the part
+# of a model's limit a class may hold.
+SCHEDULING = {
+    "call_priorities": {
+        "narrator_aside": "optional",
+        "check_scene_status": "optional",
+        "generate_stimulus": "optional",
+        "check_initiative": "optional",
+    },
+    "shares": {"interactive": 1.0, "optional": 0.75, "background": 0.5},
+}
+
+# HTTP admission control (backend/admission.py)
+# At most max_in_flight /api/start + /api/play requests run at once, up to
+# max_queue more wait in line; beyond that the server answers 429 with a
+# Retry-After. So does a request that waited max_wait seconds without getting
+# in, which bounds how long the browser can wait for a moment: /api/start
+# hands it a request timeout of the profile's moment_budget + max_wait +
+# client_timeout_margin, so it never gives up on a moment the server still
+# finishes and commits.
+ADMISSION = {
+    "max_in_flight": 16,
+    "max_queue": 32,
+    "max_wait": 30,
+    "client_timeout_margin": 30,
+}
+
+# Idempotency keys for /api/play (backend/idempotency.py)
+# A retry carrying the same Idempotency-Key joins the running moment or gets
+# its stored result instead of playing the moment again.
+IDEMPOTENCY = {
+    "max_entries": 1000,
+    "ttl_seconds": 10 * 60,
+}
+
+# Delta-encoded state in responses (backend/state_delta.py)
+# Clients send the state version they last received; the response carries a
+# JSON patch against it, or a full snapshot if that version is unknown.
+# keep_versions: served states remembered per session (and view)
+STATE_DELTA = {
+    "keep_versions": 8,
+}
+
+# Structured JSON logging off the request path (backend/log_pipeline.py)
+# Records go through a bounded queue to a background writer thread (a full
+# queue drops records rather than slowing requests). Every record carries the
+# session id and the X-Request-ID; request/result payloads are kept for
+# payload_sample_rate of the requests and truncated to max_payload_chars.
+LOGGING = {
+    "level": "INFO",
+    "queue_size": 10000,
+    "payload_sample_rate": 0.1,
+    "max_message_chars": 1000,
+    "max_payload_chars": 2000,
+}
+
+# Request tracing (backend/tracing.py)
+# Every process_moment is a trace: the moment is the root span, each budget
+# stage a child, each LLM call a grandchild tagged with model, prompt/output
+# tokens, cache reads/writes, retries and session id. Log records carry the
+# trace and span ids. Sampled traces (sample_rate of the roots) are exported
+# as Zipkin v2 JSON by a background thread: one span per line to `path`,
+# and/or POSTed in batches to a Zipkin-compatible collector_url
+# (e.g. "http://localhost:9411/api/v2/spans"). A full queue drops spans.
+# The file is rotated at max_bytes, keeping `backups` older files
+# (traces.jsonl.1, .2, ...); raise sample_rate only while investigating.
+TRACING = {
+    "enabled": True,
+    "service_name": "oops2prod",
+    "sample_rate": 0.01,
+    "path": "data/traces.jsonl",
+    "max_bytes": 50 * 1024 * 1024,
+    "backups": 2,
+    "collector_url": None,
+    "queue_size": 10000,
+    "batch_size": 100,
+}
+
+# Latency as players feel it (backend/server_timing.py, backend/telemetry.py)
+# timed_paths answer with a Server-Timing header listing each stage's duration
+# (admission wait included) and the total. The browser reports time to
+# response and time to the first rendered word to POST /api/telemetry; the
+# server matches them with its own total by X-Request-ID and splits the wait
+# into server, network and client render (GET /api/telemetry, /metrics).
+# pending_requests: server totals kept while waiting for the browser's report
+# recent_reports: reports per endpoint the p50/p95 snapshot is computed over
+# max_report_ms: longer (or negative) reported timings are rejected
+TELEMETRY = {
+    "timed_paths": ["/api/start", "/api/play"],
+    "pending_requests": 1000,
+    "recent_reports": 500,
+    "max_report_ms": 10 * 60 * 1000,
+}
@@ -6,6 +6,26 @@ const exit_button = document.getElementById("exit_button")
 
 const start_button = document.getElementById("start_button")
 
+// game session returned by /api/start, sent with every /api/play
+let sessionId = null;
+
+// latency/quality profile, e.g. ?profile=fast (server default if missing)
+const sessionProfile = new URLSearchParams(window.location.search).get("profile");
+
+// place in the server's admission queue while a request waits
+// (0 = running, -1 = server busy, retrying)
+let queuePosition = 0;
+
+// last full game state we hold and its server version; /api/play answers
+// with a JSON patch against that version instead of the whole state
+let gameState = null;
+let stateVersion = null;
+
+// the server only builds the GM debug details while the logger is open
+function responseView() {
+    return logger_button_toggle ? "debug" : "player";
+}
+
 logger_button.addEventListener("click", function () {
     logger_button_toggle = !logger_button_toggle;
 
@@ -79,14 +99,31 @@ start_button.addEventListener("click", async function () {
     start_button.classList.add("loading");
 
     let data;
+    let res;
     try {
-        const res = await fetch("/api/start", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" }
-        });
+        const showQueue = setInterval(() => {
+            if (queuePosition > 0) start_button.innerText = `In line (#${queuePosition})…`;
+            else if (queuePosition < 0) start_button.innerText = "Server busy, retrying…";
+            else start_button.innerText = "Starting…";
+        }, 500);
+
+        try {
+            res = await postGame("/api/start", {
+                view: responseView(),
+                ...(sessionProfile ? { profile: sessionProfile } : {})
+            });
+        } finally {
+            clearInterval(showQueue);
+        }
 
         if (!res.ok) throw new Error("Start failed");
         data = await res.json();
+        if (data.error) throw new Error(data.error);
+
+        sessionId = data.session_id;
+        requestTimeoutMs = data.request_timeout_ms || requestTimeoutMs;
+        gameState = data.state;
+        stateVersion = data.state_version;
 
     } catch (err) {
         start_button.innerText = "Start failed — retry";
@@ -114,7 +151,9 @@ start_button.addEventListener("click", async function () {
 
         await ghostTypeTextarea(
             textarea,
-            formatStartupInfo(data)
+            formatStartupInfo(data),
+            undefined,
+            () => reportTiming(res.timing)
         );
 
         textarea.value += "Narrator:\n";
@@ -179,12 +218,17 @@ textarea.addEventListener("keydown", async (e) => {
         const stopThinking = startThinkingDots(textarea, thinkingStart);
 
         try {
-            const response = await sendPayload(lastItem + " \0");
+            const { data: response, timing } = await sendPayload(lastItem + " \0");
 
             stopThinking();
 
             textarea.value += "\nNarrator: "
-            await ghostTypeTextarea(textarea, response.narration);
+            await ghostTypeTextarea(
+                textarea,
+                response.narration,
+                undefined,
+                () => reportTiming(timing)
+            );
             appendToLogger(response);
             enterShellMode();
 
@@ -196,7 +240,8 @@ textarea.addEventListener("keydown", async (e) => {
     }
 });
 
-async function ghostTypeTextarea(textarea, text, speed = 18) {
+// onFirstWord runs once the first whole word of text is on screen
+async function ghostTypeTextarea(textarea, text, speed = 18, onFirstWord = null) {
     return new Promise(resolve => {
         let i = 0;
 
@@ -204,6 +249,10 @@ async function ghostTypeTextarea(textarea, text, speed = 18) {
             if (i < text.length) {
                 textarea.value += text[i++];
                 textarea.scrollTop = textarea.scrollHeight;
+                if (onFirstWord && /\S/.test(text[i - 1]) && (i === text.length || /\s/.test(text[i]))) {
+                    requestAnimationFrame(onFirstWord);
+                    onFirstWord = null;
+                }
                 setTimeout(type, speed);
             } else {
                 textarea.value += "\n\n";
@@ -215,16 +264,74 @@ async function ghostTypeTextarea(textarea, text, speed = 18) {
     });
 }
 
-async function sendPayload(message) {
+function newRequestId() {
+    return window.crypto?.randomUUID
+        ? crypto.randomUUID()
+        : Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+// give up on a moment after this long; the server notices the closed
+// connection and stops paying for the calls nobody will see. /api/start
+// replaces it with the session profile's timeout, which always leaves the
+// server time to finish its moment budget and admission wait first
+let requestTimeoutMs = 180000;
+
+// POST to a game endpoint through the server's admission queue:
+// polls our place in line while waiting and retries after a 429.
+// The request id doubles as the Idempotency-Key, so a retry of the same
+// moment is never played twice.
+async function postGame(url, body, maxRetries = 3) {
+    const requestId = newRequestId();
+
+    const poll = setInterval(async () => {
+        try {
+            const res = await fetch(`/api/queue/${requestId}`);
+            const queue = await res.json();
+            if (queuePosition >= 0) queuePosition = queue.position || 0;
+        } catch (err) {
+            // the position is only informational
+        }
+    }, 1000);
 
-    const res = await fetch("/api/play", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-            event: {
-                message: message
+    try {
+        for (let attempt = 0; ; attempt++) {
+            const sentAt = performance.now();
+            const res = await fetch(url, {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json",
+                    "X-Request-ID": requestId,
+                    "Idempotency-Key": requestId
+                },
+                body: JSON.stringify(body),
+                signal: AbortSignal.timeout(requestTimeoutMs)
+            });
+
+            if (res.status !== 429 || attempt >= maxRetries) {
+                res.timing = { requestId, sentAt, respondedAt: performance.now() };
+                return res;
             }
-        })
+
+            queuePosition = -1;
+            const wait = Number(res.headers.get("Retry-After")) || 2;
+            await new Promise(resolve => setTimeout(resolve, wait * 1000));
+            queuePosition = 0;
+        }
+    } finally {
+        clearInterval(poll);
+        queuePosition = 0;
+    }
+}
+
+async function sendPayload(message) {
+
+    const res = await postGame("/api/play", {
+        session_id: sessionId,
+        state_version: stateVersion,
+        view: responseView(),
+        event: {
+            message: message
+        }
     });
 
     if (!res.ok) throw new Error("Request failed");
@@ -232,7 +339,76 @@ async function sendPayload(message) {
     const data = await res.json();
     //console.log("sending payload:", data);
 
-    return data;
+    await trackState(data);
+
+    return { data, timing: res.timing };
+}
+
+// Report how long the player waited for a game request (called when its
+// first word is on screen); the server splits that into its own time,
+// the network's and ours (GET /api/telemetry)
+function reportTiming(timing) {
+    if (!timing) return;
+
+    const report = JSON.stringify({
+        request_id: timing.requestId,
+        response_ms: Math.round(timing.respondedAt - timing.sentAt),
+        first_word_ms: Math.round(performance.now() - timing.sentAt)
+    });
+
+    // a beacon never holds up the page; plain fetch where it is missing
+    if (!navigator.sendBeacon?.("/api/telemetry", report)) {
+        fetch("/api/telemetry", { method: "POST", body: report, keepalive: true })
+            .catch(() => {});
+    }
+}
+
+// Bring gameState up to date from a response (full state or patch) and
+// put the full state back on data.state for the rest of the UI
+async function trackState(data) {
+    if (data.state_version === undefined) return;
+
+    if (data.state_patch) {
+        try {
+            if (data.state_base_version !== stateVersion) throw new Error("Stale base");
+            gameState = applyPatch(gameState, data.state_patch);
+        } catch (err) {
+            // lost track, ask for a full snapshot
+            console.error(err);
+            const res = await fetch(`/api/state/${sessionId}?view=${responseView()}`);
+            const snapshot = await res.json();
+            if (snapshot.error) return;
+            data.state_version = snapshot.state_version;
+            gameState = snapshot.state;
+        }
+    } else {
+        gameState = data.state;
+    }
+
+    stateVersion = data.state_version;
+    data.state = gameState;
+}
+
+// JSON patch (RFC 6902 add/remove/replace) applied to a copy of doc
+function applyPatch(doc, ops) {
+    const root = { value: structuredClone(doc) };
+    for (const op of ops) {
+        const keys = ("/value" + op.path).split("/").slice(1)
+            .map(key => key.replace(/~1/g, "/").replace(/~0/g, "~"));
+        const last = keys.pop();
+        let target = root;
+        for (const key of keys) {
+            target = target[key];
+            if (target === undefined || target === null) throw new Error(`Bad patch path ${op.path}`);
+        }
+        if (Array.isArray(target)) {
+            if (op.op === "remove") target.splice(Number(last), 1);
+            else if (op.op === "add") target.splice(last === "-" ? target.length : Number(last), 0, op.value);
+            else target[Number(last)] = op.value;
+        } else if (op.op === "remove") delete target[last];
+        else target[last] = op.value;
+    }
+    return root.value;
 }
 
 function startThinkingDots(textarea, startIndex) {
@@ -268,8 +444,12 @@ function startThinkingDots(textarea, startIndex) {
             dots = 0;
         }
 
+        let shown = currentPhrase;
+        if (queuePosition > 0) shown = `Waiting in line (#${queuePosition})`;
+        else if (queuePosition < 0) shown = "Server busy, retrying";
+
         textarea.value = textarea.value.slice(0, startIndex);
-        textarea.value += currentPhrase + ".".repeat(dots);
+        textarea.value += shown + ".".repeat(dots);
         textarea.scrollTop = textarea.scrollHeight;
     }, 400);
 
@@ -0,0 +1,142 @@
+# A moment cancelled halfway leaves no trace in the game state, and a rewind
+# or branch takes the agents' state back with it; no API calls (the agents
+# are stubbed). Run from the repo root:
+#   PYTHONPATH=. python test/tb_moment_rollback.py
+import asyncio
+import json
+import os
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "unused")
+
+from backend.agents.gm_agent import GMAgent
+from backend.agents.narrator_agent import NarratorAgent
+from backend.game_engine import OrganicMultiAgentEngine
+
+scene_check_started = asyncio.Event()
+scene_check_blocks = True
+
+
+async def opening(self, game_state):
+    return {"player_intro": "You step into the room."}
+
+
+async def interpret(self, player_input, initiator, game_state):
+    return {
+        "what_happens": f"The player says: {player_input}",
+        "affected_npcs": [],
+        "context_for_npcs": "",
+        "tension_delta": 1,
+    }
+
+
+async def synthesize(self, interpretation, npc_responses, game_state):
+    return {"narrative": interpretation["what_happens"], "tension_level": 6}
+
+
+async def narrate(self, gm_facts, npc_responses, game_state, changes=None, debug=True):
+    return {"narration": gm_facts["what_happens"]}
+
+
+def aside_gate(self, game_state):
+    return True
+
+
+async def aside_call(self, prompt, call_type, response_schema, validator=None):
+    return json.dumps({"should_add_aside": True, "aside_text": "I've seen this before."})
+
+
+async def check_scene(self, game_state):
+    scene_check_started.set()
+    if scene_check_blocks:
+        await asyncio.sleep(3600)  # cancelled long before
+    return {
+        "energy_assessment": "rising",
+        "needs_stimulus": False,
+        "stimulus_suggestion": "",
+        "approaching_ending": False,
+        "ending_type": "null",
+    }
+
+
+async def stimulus(self, game_state):
+    return "The lights flicker."
+
+
+GMAgent.generate_opening_scene = opening
+GMAgent.interpret_moment = interpret
+GMAgent.synthesize_narrative = synthesize
+GMAgent.check_scene_status = check_scene
+GMAgent.generate_stimulus = stimulus
+NarratorAgent.narrate_moment = narrate
+NarratorAgent._aside_gate = aside_gate
+NarratorAgent._call_claude = aside_call
+
+
+def snapshot(engine):
+    return (
+        engine.state.moment_count,
+        len(engine.state.event_log),
+        engine.state.tension_level,
+        sorted(engine.checkpoints),
+        engine.versions.version,
+        # agent state changed by a moment: pacing history, aside cooldown/budget
+        list(engine.pacing.tension_history),
+        engine.narrator_agent._last_aside_moment,
+        engine.narrator_agent.aside_stats["produced"],
+    )
+
+
+async def main():
+    global scene_check_blocks
+
+    engine = OrganicMultiAgentEngine()
+    await engine.start_game()
+    before = snapshot(engine)
+    print("before:   ", before)
+
+    # cancelled while check_scene_status runs (client gone, deadline)
+    moment = asyncio.create_task(engine.process_moment("Who was here last night?"))
+    await scene_check_started.wait()
+    moment.cancel()
+    try:
+        await moment
+    except asyncio.CancelledError:
+        pass
+
+    after = snapshot(engine)
+    print("cancelled:", after)
+    assert after == before, "cancelled moment changed the state"
+    assert not engine._moment_in_flight
+
+    # the same moment played to the end lands whole
+    scene_check_blocks = False
+    await engine.process_moment("Who was here last night?")
+    played = snapshot(engine)
+    print("played:   ", played)
+    moment_count, events, _, checkpoints, version, tensions, last_aside, asides = played
+    assert moment_count == before[0] + 1
+    assert events == before[1] + 1
+    assert checkpoints == before[3] + [moment_count]
+    assert version > before[4]
+    assert tensions == before[5] + [6]
+    assert last_aside == moment_count and asides == before[7] + 1
+
+    # two more moments, then back: the agents forget them along with the state
+    await engine.process_moment("And the night before?")
+    await engine.process_moment("Who else knew?")
+    await asyncio.sleep(0)  # let the stimulus pool refill
+    rewound = await engine.rewind(moment_count)
+    assert "error" not in rewound
+    print("rewound:  ", snapshot(engine))
+    assert snapshot(engine)[5:] == played[5:]
+    assert engine.stimulus_pool._entries == []
+
+    # a branch starts from the same agent state as the moment it forks
+    branched = engine.branch(moment_count, "branch")
+    print("branched: ", snapshot(branched))
+    assert snapshot(branched)[5:] == played[5:]
+
+    print("ok")
+
+
+asyncio.run(main())
@@ -0,0 +1,132 @@
+# Benchmark: per-NPC fan-out vs single-call ensemble
+# Run from the repo root: PYTHONPATH=. python test/tb_npc_ensemble.py
+import asyncio
+import copy
+import time
+
+from backend.models.game_state import GameState
+from backend.models.npc_state import NPCState
+from backend.agents.npc_agent import NPCAgent
+from backend.agents.npc_ensemble_agent import NPCEnsembleAgent
+from backend.text_similarity import content_words
+
+ROUNDS = 3
+
+CONTEXTS = [
+    "The player slams a folder of photos on the table and asks who was in the back office last night",
+    "The lights flicker and a phone starts ringing somewhere down the hall",
+    "The player says quietly that someone in this room is lying, and looks at each of them in turn",
+]
+
+n1 = NPCState("frank",
+    "Frank",
+    "Defensive, nervous, quick to anger",
+    "Avoid revealing his involvement",
+    ["He lied about where he was last night", "He hid the ledger behind the vending machine"])
+n1.urgency_level = 6
+
+n2 = NPCState("maria",
+    "Maria",
+    "Calm, observant, quietly manipulative",
+    "Shift suspicion away from herself",
+    ["She overheard the argument", "She tampered with the security tapes"])
+n2.urgency_level = 4
+
+n3 = NPCState("leo",
+    "Leo",
+    "Young, eager to please, terrible liar",
+    "Keep his job",
+    ["He gave Frank the spare key"])
+n3.urgency_level = 3
+
+base_state = GameState("Interrogation Room",
+"""
+A tense interrogation in a dimly lit room. Everyone has something to hide.
+""", "detective")
+for npc in (n1, n2, n3):
+    base_state.npcs[npc.npc_id] = npc
+
+
+def leaked_secrets(response: dict, state: GameState) -> int:
+    """Count other NPCs' secrets whose distinctive words show up in this NPC's output"""
+    said = content_words(" ".join(
+        str(response.get(key) or "") for key in ("dialogue", "action", "internal_thought")
+    ))
+    own = content_words(" ".join(state.npcs[response["npc_id"]].secrets))
+
+    leaks = 0
+    for npc_id, npc in state.npcs.items():
+        if npc_id == response["npc_id"]:
+            continue
+        for secret in npc.secrets:
+            distinctive = content_words(secret) - own
+            if len(distinctive & said) >= 2:
+                leaks += 1
+    return leaks
+
+
+def score(responses, state):
+    complete = sum(
+        1 for r in responses
+        if r.get("emotional_state") and (r.get("dialogue") or r.get("action"))
+    )
+    leaks = sum(leaked_secrets(r, state) for r in responses)
+    return complete, leaks
+
+
+async def run_fanout(state, context):
+    agents = {npc_id: NPCAgent(npc) for npc_id, npc in state.npcs.items()}
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *[agent.respond_to_moment(context, state) for agent in agents.values()]
+    )
+    elapsed = time.perf_counter() - start
+    tokens_in = sum(a.last_usage.input_tokens for a in agents.values() if a.last_usage)
+    tokens_out = sum(a.last_usage.output_tokens for a in agents.values() if a.last_usage)
+    return elapsed, tokens_in, tokens_out, responses
+
+
+async def run_ensemble(state, context):
+    agents = {npc_id: NPCAgent(npc) for npc_id, npc in state.npcs.items()}
+    ensemble = NPCEnsembleAgent(agents)
+    start = time.perf_counter()
+    responses = await ensemble.respond_to_moment(context, list(state.npcs), state)
+    elapsed = time.perf_counter() - start
+    # the ensemble call plus any individual calls for NPCs it left out
+    # (every agent is fresh, so a last_usage means it was called this run)
+    usages = [ensemble.last_usage] + [a.last_usage for a in agents.values()]
+    tokens_in = sum(u.input_tokens for u in usages if u)
+    tokens_out = sum(u.output_tokens for u in usages if u)
+    return elapsed, tokens_in, tokens_out, responses
+
+
+async def main():
+    totals = {"fan-out": [0, 0, 0, 0, 0], "ensemble": [0, 0, 0, 0, 0]}
+
+    for round_number in range(ROUNDS):
+        for context in CONTEXTS:
+            for mode, runner in (("fan-out", run_fanout), ("ensemble", run_ensemble)):
+                # every run starts from the same NPC states
+                state = copy.deepcopy(base_state)
+                elapsed, tokens_in, tokens_out, responses = await runner(state, context)
+                complete, leaks = score(responses, state)
+
+                t = totals[mode]
+                t[0] += elapsed
+                t[1] += tokens_in
+                t[2] += tokens_out
+                t[3] += complete
+                t[4] += leaks
+
+                print(f"[round {round_number}] {mode:9} {elapsed:6.2f}s  "
+                      f"in {tokens_in:5}  out {tokens_out:4}  "
+                      f"complete {complete}/{len(responses)}  leaks {leaks}")
+
+    runs = ROUNDS * len(CONTEXTS)
+    print("\nAVERAGE PER MOMENT (3 NPCs)")
+    for mode, (elapsed, tokens_in, tokens_out, complete, leaks) in totals.items():
+        print(f"  {mode:9} latency {elapsed / runs:6.2f}s  "
+              f"input tokens {tokens_in / runs:7.1f}  output tokens {tokens_out / runs:6.1f}  "
+              f"complete {complete}/{runs * len(base_state.npcs)}  secret leaks {leaks}")
+
+asyncio.run(main())
@@ -0,0 +1,63 @@
+# Local pacing estimator: stalled runs and endings, no API calls
+# Run from the repo root: PYTHONPATH=. python test/tb_pacing.py
+from backend.models.game_state import GameState
+from backend.pacing import PacingEstimator
+
+
+def new_state():
+    return GameState("Interrogation Room", "A tense interrogation.", "detective")
+
+
+def play(estimator, state, energies, tension=5):
+    """Play one committed moment per scene energy, returns the last estimate"""
+    for energy in energies:
+        state.moment_count += 1
+        state.scene_energy = energy
+        state.tension_level = tension
+        estimate = estimator.estimate(state)
+        estimator.record(tension, energy, checked=False)
+    return estimate
+
+
+# same energy, flat tension for stall_moments moments: stalled
+state = new_state()
+estimate = play(PacingEstimator(stall_moments=3), state, ["plateau"] * 3)
+print("stalled run:", estimate)
+assert estimate["energy_assessment"] == "stalled"
+assert estimate["needs_stimulus"] is True
+
+# one moment short of the run is not a stall yet
+state = new_state()
+estimate = play(PacingEstimator(stall_moments=3), state, ["building", "plateau", "plateau"])
+print("short run:  ", estimate)
+assert not estimate["needs_stimulus"]
+
+# tension moving is not a stall
+state = new_state()
+estimator = PacingEstimator(stall_moments=3)
+for tension in (3, 5, 7):
+    estimate = play(estimator, state, ["plateau"], tension=tension)
+print("rising:     ", estimate)
+assert estimate["energy_assessment"] == "rising" and not estimate["needs_stimulus"]
+
+# an estimate alone (a moment not committed yet) leaves the history as is
+estimate = estimator.estimate(state)
+assert len(estimator.tension_history) == 3
+
+# resolving twice in a row: an ending
+state = new_state()
+estimate = play(PacingEstimator(), state, ["climactic", "resolving", "resolving"])
+print("resolving:  ", estimate)
+assert estimate["approaching_ending"] and estimate["ending_type"] == "resolution"
+
+# out of time: the same ending the engine forces at max_moments
+state = new_state()
+state.max_moments = 5
+estimator = PacingEstimator()
+estimate = play(estimator, state, ["building"] * 4)
+assert not estimate["approaching_ending"]
+estimate = play(estimator, state, ["building"])
+print("time limit: ", estimate)
+assert estimate["approaching_ending"] and estimate["ending_type"] == "time_limit"
+
+print("ok")